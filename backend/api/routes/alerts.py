@@ -24,15 +24,11 @@ def _parse_timestamp(value):
         return datetime.fromtimestamp(value)
     if isinstance(value, str):
         try:
-            # Try ISO format first
+            # Python 3.11+ fromisoformat also accepts the "YYYY-MM-DD HH:MM:SS" form
             return datetime.fromisoformat(value)
         except ValueError:
-            try:
-                # Try "YYYY-MM-DD HH:MM:SS" format
-                return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-            except ValueError:
-                logger.warning("Could not parse timestamp: %s, using current time", value)
-                return datetime.utcnow()
+            logger.warning("Could not parse timestamp: %s, using current time", value)
+            return datetime.utcnow()
     return datetime.utcnow()
 
 
@@ -192,9 +188,9 @@ async def get_alerts(
     if severity:
         query["severity"] = severity
     
-    # Device filter
+    # Device filter (alerts are keyed by device IP; device_id is not stored separately)
     if device_id:
-        query["device_id"] = device_id
+        query["device_ip"] = device_id
     
     # Fetch alerts
     alerts = await alerts_collection.find(query).sort("timestamp", -1).limit(limit).to_list(length=limit)
@@ -214,6 +210,9 @@ async def get_alerts(
         if "severity" in alert:
             alert["severity"] = _parse_severity(alert["severity"]).value
         
+        # The device IP doubles as the device ID in responses
+        alert.setdefault("device_id", alert.get("device_ip"))
+        
         # Convert ObjectId to string
         if isinstance(alert.get("_id"), dict) or (hasattr(alert.get("_id"), "__str__") and not isinstance(alert.get("_id"), str)):
             alert["_id"] = str(alert["_id"])
@@ -10,7 +10,8 @@ from core.security import (
     authenticate_user,
     create_access_token,
     create_refresh_token,
-    get_current_user
+    get_current_user,
+    invalidate_user_cache
 )
 from config import settings
 
@@ -35,6 +36,7 @@ async def login(credentials: UserLogin):
         {"_id": user["_id"]},
         {"$set": {"last_login": datetime.utcnow()}}
     )
+    invalidate_user_cache(user["username"])
     
     # Enforce single admin access
     if user.get("role", UserRole.ADMIN) != UserRole.ADMIN:
@@ -202,11 +202,10 @@ async def get_devices(current_user: dict = Depends(get_current_user)):
                 # Check actual firewall state (nftables)
                 is_blocked = firewall.is_ip_blocked_in_firewall(ip)
                 firewall_check_worked = True
-                logger.info(f"[DEVICE_STATUS] IP: {ip} | Firewall check: {'BLOCKED' if is_blocked else 'NOT BLOCKED'}")
-                print(f"[DEVICE_STATUS] IP: {ip} | Firewall: {'🚫 BLOCKED' if is_blocked else '✅ NOT BLOCKED'}", flush=True)
+                # Runs for every device on every list request, so keep it out of INFO
+                logger.debug(f"[DEVICE_STATUS] IP: {ip} | Firewall check: {'BLOCKED' if is_blocked else 'NOT BLOCKED'}")
             except Exception as e:
                 logger.warning(f"[DEVICE_STATUS] Failed to check firewall state for {ip}: {e}")
-                print(f"[DEVICE_STATUS] ⚠️  Firewall check failed for {ip}: {e}", flush=True)
         
         # Only use files/DB as fallback if firewall check completely failed
         # If firewall check worked, trust it (even if it says not blocked)
@@ -468,7 +467,7 @@ async def block_device(
         )
     
     # Block device in firewall
-    success = firewall.block_device(device["ip"], device["mac"])
+    success = await firewall.block_device_async(device["ip"], device["mac"])
     
     if not success:
         # Proceed anyway to update DB status? Or fail?
@@ -527,12 +526,12 @@ async def unblock_device(
         )
     
     # Unblock device in firewall
-    success = firewall.unblock_device(device["ip"], device["mac"])
+    success = await firewall.unblock_device_async(device["ip"], device["mac"])
     
     if not success:
         logger.warning(f"Firewall unblock command failed for {device['ip']}")
         # Check if device is already unblocked in firewall
-        if not firewall.is_ip_blocked_in_firewall(device["ip"]):
+        if not firewall.is_ip_blocked_in_firewall(device["ip"], force_refresh=True):
             # Device is not blocked in firewall, so treat as success
             logger.info(f"Device {device['ip']} is not blocked in firewall, treating unblock as successful")
             success = True
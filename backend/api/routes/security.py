@@ -10,6 +10,7 @@ from bson.objectid import ObjectId
 from database.models import SecurityAlert, SecurityAlertResponse, SecurityLog, SecurityLogResponse, SecuritySeverity, SecurityAlertType
 from database.mongodb import get_security_alerts_collection, get_security_logs_collection
 from core.security import get_current_user
+from core.log_batcher import security_log_batcher
 
 router = APIRouter()
 
@@ -25,10 +26,12 @@ async def get_security_alerts(
     """Get security alerts with filtering"""
     collection = get_security_alerts_collection()
     
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    
     # Build filter
     filter_dict = {
         "timestamp": {
-            "$gte": datetime.utcnow() - timedelta(days=days)
+            "$gte": cutoff
         }
     }
     
@@ -37,15 +40,12 @@ async def get_security_alerts(
     if alert_type:
         filter_dict["alert_type"] = alert_type
     
-    # Get alerts sorted by timestamp (newest first)
-    alerts = await collection.find(filter_dict).sort("timestamp", -1).limit(limit).to_list(None)
+    # Get alerts sorted by timestamp (newest first), converting as the cursor streams
+    cursor = collection.find(filter_dict).sort("timestamp", -1).limit(limit)
     
     return [
-        SecurityAlertResponse(
-            _id=str(alert["_id"]),
-            **alert
-        )
-        for alert in alerts
+        SecurityAlertResponse(**{**alert, "_id": str(alert["_id"])})
+        async for alert in cursor
     ]
 
 
@@ -125,12 +125,17 @@ async def get_alerts_summary(
     """Get security alerts summary statistics"""
     collection = get_security_alerts_collection()
     
-    # Get all alerts in timeframe
-    alerts = await collection.find({
-        "timestamp": {
-            "$gte": datetime.utcnow() - timedelta(days=days)
-        }
-    }).to_list(None)
+    # Count everything server-side in one pass instead of pulling every alert
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": cutoff}}},
+        {"$facet": {
+            "by_severity": [{"$group": {"_id": "$severity", "count": {"$sum": 1}}}],
+            "by_type": [{"$group": {"_id": "$alert_type", "count": {"$sum": 1}}}],
+            "acknowledged": [{"$match": {"acknowledged": True}}, {"$count": "count"}],
+        }}
+    ]
+    result = (await collection.aggregate(pipeline).to_list(length=1))[0]
     
     # Calculate statistics
     severity_counts = {
@@ -139,21 +144,18 @@ async def get_alerts_summary(
         "critical": 0,
         "emergency": 0
     }
+    for item in result["by_severity"]:
+        severity = item["_id"] or "info"
+        severity_counts[severity] = severity_counts.get(severity, 0) + item["count"]
     
-    type_counts = {}
-    acknowledged_count = 0
-    
-    for alert in alerts:
-        severity_counts[alert.get("severity", "info")] += 1
-        alert_type = alert.get("alert_type", "unknown")
-        type_counts[alert_type] = type_counts.get(alert_type, 0) + 1
-        if alert.get("acknowledged", False):
-            acknowledged_count += 1
+    type_counts = {(item["_id"] or "unknown"): item["count"] for item in result["by_type"]}
+    total_alerts = sum(item["count"] for item in result["by_severity"])
+    acknowledged_count = result["acknowledged"][0]["count"] if result["acknowledged"] else 0
     
     return {
-        "total_alerts": len(alerts),
+        "total_alerts": total_alerts,
         "acknowledged": acknowledged_count,
-        "unacknowledged": len(alerts) - acknowledged_count,
+        "unacknowledged": total_alerts - acknowledged_count,
         "by_severity": severity_counts,
         "by_type": type_counts,
         "timeframe_days": days
@@ -193,10 +195,12 @@ async def get_security_logs(
     """Get security logs with filtering"""
     collection = get_security_logs_collection()
     
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    
     # Build filter
     filter_dict = {
         "timestamp": {
-            "$gte": datetime.utcnow() - timedelta(days=days)
+            "$gte": cutoff
         }
     }
     
@@ -205,15 +209,12 @@ async def get_security_logs(
     if severity:
         filter_dict["severity"] = severity
     
-    # Get logs sorted by timestamp (newest first)
-    logs = await collection.find(filter_dict).sort("timestamp", -1).limit(limit).to_list(None)
+    # Get logs sorted by timestamp (newest first), converting as the cursor streams
+    cursor = collection.find(filter_dict).sort("timestamp", -1).limit(limit)
     
     return [
-        SecurityLogResponse(
-            _id=str(log["_id"]),
-            **log
-        )
-        for log in logs
+        SecurityLogResponse(**{**log, "_id": str(log["_id"])})
+        async for log in cursor
     ]
 
 
@@ -222,19 +223,21 @@ async def create_security_log(
     log: SecurityLog,
     current_user: dict = Depends(get_current_user)
 ):
-    """Create a security log entry"""
-    collection = get_security_logs_collection()
-    
+    """Create a security log entry (written together with concurrent entries in one batch)"""
     log_dict = log.model_dump()
+    # Assign the id up front so the response doesn't need a read-back
+    log_dict["_id"] = ObjectId()
     
-    result = await collection.insert_one(log_dict)
-    
-    created_log = await collection.find_one({"_id": result.inserted_id})
+    # Audit records must not be dropped silently: only respond once the batch is stored
+    try:
+        await security_log_batcher.enqueue(log_dict)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Security log could not be stored"
+        )
     
-    return SecurityLogResponse(
-        _id=str(created_log["_id"]),
-        **created_log
-    )
+    return SecurityLogResponse(**{**log_dict, "_id": str(log_dict["_id"])})
 
 
 @router.get("/security-logs/stats/summary")
@@ -245,32 +248,29 @@ async def get_logs_summary(
     """Get security logs summary statistics"""
     collection = get_security_logs_collection()
     
-    # Get all logs in timeframe
-    logs = await collection.find({
-        "timestamp": {
-            "$gte": datetime.utcnow() - timedelta(days=days)
-        }
-    }).to_list(None)
-    
-    # Calculate statistics
-    success_count = sum(1 for log in logs if log.get("status") == "success")
-    failure_count = sum(1 for log in logs if log.get("status") == "failure")
-    
-    actions = {}
-    actors = {}
-    
-    for log in logs:
-        action = log.get("action", "unknown")
-        actions[action] = actions.get(action, 0) + 1
-        
-        actor = log.get("actor", "unknown")
-        actors[actor] = actors.get(actor, 0) + 1
+    # Single pass over the window: status counters via $cond, per-dimension counts via $facet
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": cutoff}}},
+        {"$facet": {
+            "totals": [{"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "success": {"$sum": {"$cond": [{"$eq": ["$status", "success"]}, 1, 0]}},
+                "failure": {"$sum": {"$cond": [{"$eq": ["$status", "failure"]}, 1, 0]}},
+            }}],
+            "by_action": [{"$group": {"_id": "$action", "count": {"$sum": 1}}}],
+            "by_actor": [{"$group": {"_id": "$actor", "count": {"$sum": 1}}}],
+        }}
+    ]
+    result = (await collection.aggregate(pipeline).to_list(length=1))[0]
+    totals = result["totals"][0] if result["totals"] else {"total": 0, "success": 0, "failure": 0}
     
     return {
-        "total_actions": len(logs),
-        "successful": success_count,
-        "failed": failure_count,
-        "by_action": actions,
-        "by_actor": actors,
+        "total_actions": totals["total"],
+        "successful": totals["success"],
+        "failed": totals["failure"],
+        "by_action": {(item["_id"] or "unknown"): item["count"] for item in result["by_action"]},
+        "by_actor": {(item["_id"] or "unknown"): item["count"] for item in result["by_actor"]},
         "timeframe_days": days
     }
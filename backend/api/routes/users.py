@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, Body
 from typing import Dict, Any
 from database.mongodb import get_users_collection
 from database.models import UserProfile
-from core.security import get_current_user
+from core.security import get_current_user, invalidate_user_cache
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
@@ -41,24 +42,25 @@ async def update_current_user_profile(
     
     # If updating preferences, merge with existing
     if "preferences" in update_data:
-        current_prefs = current_user.get("preferences", {})
-        current_prefs.update(update_data["preferences"])
-        update_data["preferences"] = current_prefs
+        update_data["preferences"] = {**current_user.get("preferences", {}), **update_data["preferences"]}
     
     update_data["updated_at"] = datetime.utcnow()
     
     # Perform update
+    # Project out credentials - they're never part of the profile response
     result = await users_collection.find_one_and_update(
         {"_id": current_user["_id"]},
         {"$set": update_data},
-        return_document=True
+        projection={"password_hash": 0},
+        return_document=ReturnDocument.AFTER
     )
     
+    invalidate_user_cache(current_user["username"])
+    
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
         
     # Fix _id for response model
-    result["id"] = str(result["_id"])
     result["_id"] = str(result["_id"])
         
     return result
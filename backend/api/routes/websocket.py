@@ -1,15 +1,24 @@
 """
 WebSocket API Routes for Real-time Communication
 """
+import logging
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError, jwt
 
+from config import settings
 from core.websocket_manager import websocket_manager
 from core.security import decode_token
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 security = HTTPBearer()
 
+# Keepalive reply is constant, so serialize it once at import
+PONG_FRAME = orjson.dumps({"type": "pong", "message": "Connection alive"}).decode()
+
 
 async def verify_websocket_token(websocket: WebSocket, token: str = None):
     """Verify JWT token for WebSocket connection"""
@@ -22,9 +31,6 @@ async def verify_websocket_token(websocket: WebSocket, token: str = None):
         if token.startswith("Bearer "):
             token = token[7:]
         
-        from jose import JWTError, jwt
-        from config import settings
-        
         # Decode token directly (don't use decode_token as it raises HTTPException)
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email = payload.get("sub")
@@ -32,18 +38,16 @@ async def verify_websocket_token(websocket: WebSocket, token: str = None):
             await websocket.close(code=1008, reason="Invalid token")
             return None
         return payload
-    except Exception as e:
+    except JWTError:
         await websocket.close(code=1008, reason="Invalid token")
         return None
 
 
-@router.websocket("/ws/alerts")
-async def websocket_alerts(websocket: WebSocket, token: str = None):
-    """
-    WebSocket endpoint for real-time alerts
-    
-    Connect with: ws://host/ws/alerts?token=YOUR_JWT_TOKEN
-    """
+WEBSOCKET_CHANNELS = frozenset({"alerts", "devices"})
+
+
+async def _channel_ws(websocket: WebSocket, channel: str):
+    """Authenticate, register and keep alive a WebSocket on the given channel"""
     # Get token from query parameter
     token = websocket.query_params.get("token")
     
@@ -52,49 +56,31 @@ async def websocket_alerts(websocket: WebSocket, token: str = None):
     if not user:
         return
     
-    # Connect to alerts channel
-    await websocket_manager.connect(websocket, "alerts")
+    await websocket_manager.connect(websocket, channel)
     
     try:
         while True:
             # Keep connection alive and listen for messages
             data = await websocket.receive_text()
             # Echo back or process message if needed
-            await websocket.send_json({"type": "pong", "message": "Connection alive"})
+            await websocket.send_text(PONG_FRAME)
     except WebSocketDisconnect:
-        websocket_manager.disconnect(websocket, "alerts")
+        websocket_manager.disconnect(websocket, channel)
     except Exception as e:
-        print(f"WebSocket error: {e}")
-        websocket_manager.disconnect(websocket, "alerts")
+        logger.warning(f"WebSocket error on channel {channel}: {e}")
+        websocket_manager.disconnect(websocket, channel)
 
 
-@router.websocket("/ws/devices")
-async def websocket_devices(websocket: WebSocket, token: str = None):
+@router.websocket("/ws/{channel}")
+async def websocket_channel(websocket: WebSocket, channel: str):
     """
-    WebSocket endpoint for real-time device updates
+    WebSocket endpoint for real-time alerts and device updates
     
-    Connect with: ws://host/ws/devices?token=YOUR_JWT_TOKEN
+    Connect with: ws://host/ws/alerts?token=YOUR_JWT_TOKEN
+              or: ws://host/ws/devices?token=YOUR_JWT_TOKEN
     """
-    # Get token from query parameter
-    token = websocket.query_params.get("token")
-    
-    # Verify authentication
-    user = await verify_websocket_token(websocket, token)
-    if not user:
+    if channel not in WEBSOCKET_CHANNELS:
+        await websocket.close(code=1008, reason="Unknown channel")
         return
     
-    # Connect to devices channel
-    await websocket_manager.connect(websocket, "devices")
-    
-    try:
-        while True:
-            # Keep connection alive and listen for messages
-            data = await websocket.receive_text()
-            # Echo back or process message if needed
-            await websocket.send_json({"type": "pong", "message": "Connection alive"})
-    except WebSocketDisconnect:
-        websocket_manager.disconnect(websocket, "devices")
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-        websocket_manager.disconnect(websocket, "devices")
-
+    await _channel_ws(websocket, channel)
@@ -1,7 +1,8 @@
 """
 Configuration settings for HomeGuard backend
 """
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List, Optional
 import os
 
@@ -20,17 +21,23 @@ class Settings(BaseSettings):
     # Keep admin dashboard sessions stable (avoids WebSocket 403/401 after short expiry)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    USER_CACHE_TTL: int = 30  # Seconds an authenticated user document is reused across requests
+    ADMIN_PASSWORD_HASH: Optional[str] = None  # Pre-computed bcrypt hash for the seeded admin; skips hashing in init_db
     
     # Database
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "homeguard"
+    MONGODB_MAX_POOL_SIZE: int = 50  # One event loop rarely has more concurrent awaits in flight
+    MONGODB_MIN_POOL_SIZE: int = 5  # Kept warm so the first request burst skips the connect/auth handshake
+    MONGODB_MAX_IDLE_TIME_MS: int = 60000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGODB_COMPRESSORS: str = ""  # e.g. "zstd,zlib" when MongoDB is on another host; empty = no wire compression
     DEVICES_FILE_PATH: str | None = "/data/active_devices.json"  # Real-time device status (from monitor_network.py)
     DEVICES_METADATA_FILE_PATH: str | None = "/data/devices.json"  # Device metadata/names
     ALERTS_FILE_PATH: str | None = "/data/alerts.json"  # Alerts file
-    
-    # Zeek Integration
-    ZEEK_LOG_PATH: str = "/var/log/zeek"
-    ZEEK_CONN_LOG: str = "conn.log"
+    SECURITY_ALERT_RETENTION_DAYS: int = 90  # TTL for security_alerts documents
+    SECURITY_LOG_RETENTION_DAYS: int = 180  # TTL for security_logs documents
     
     # Frontend
     FRONTEND_URL: str = "http://192.168.100.119/"
@@ -47,13 +54,16 @@ class Settings(BaseSettings):
     EMAIL_PASSWORD: Optional[str] = None
     EMAIL_FROM: str = "noreply@homeguard.local"
     EMAIL_ENABLED: bool = False
+    EMAIL_WORKERS: int = 5
+    EMAIL_QUEUE_SIZE: int = 100
+    EMAIL_CONNECT_TIMEOUT: float = 10.0
+    EMAIL_IO_TIMEOUT: float = 30.0
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Frozen: settings are read on every request/handshake and never mutated at runtime.
+    # Unknown .env keys (e.g. the removed ZEEK_* paths) are ignored so older deployments still start.
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True, extra="ignore")
     
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+    def model_post_init(self, __context):
         # Warn if using default secret key in production
         if self.SECRET_KEY == "dev-secret-key-change-in-production" and self.ENV == "production":
             import warnings
@@ -64,4 +74,10 @@ class Settings(BaseSettings):
             )
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build settings once (env + .env parsing) and reuse the instance"""
+    return Settings()
+
+
+settings = get_settings()
@@ -2,12 +2,19 @@
 Alert File Monitor - Watches alerts.json for new alerts and sends WebSocket notifications
 """
 import asyncio
+import hashlib
 import json
 import logging
+import sys
+import aiofiles
+import orjson
 from pathlib import Path
-from typing import Set, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple, TypedDict
 from datetime import datetime
 
+from pymongo.errors import BulkWriteError
+from watchfiles import awatch
+
 from core.websocket_manager import websocket_manager
 from core.email import email_service
 from database.mongodb import get_users_collection, get_alerts_collection
@@ -16,22 +23,127 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Alerts synced per existence check + insert_many during the initial load
+INITIAL_SYNC_BATCH_SIZE = 1000
+
+
+# Map common variations to valid enum values
+_SEVERITY_MAP = {
+    "low": "low",
+    "medium": "medium",
+    "med": "medium",
+    "high": "high",
+    "critical": "critical",
+    "crit": "critical",
+}
+
+
+_VALID_SEVERITIES = frozenset(("low", "medium", "high", "critical"))
+
 
 def _normalize_severity(severity: str) -> str:
     """Normalize severity string to valid enum value"""
-    if not severity:
-        return "low"
-    severity_lower = str(severity).lower()
-    # Map common variations to valid enum values
-    severity_map = {
-        "low": "low",
-        "medium": "medium",
-        "med": "medium",
-        "high": "high",
-        "critical": "critical",
-        "crit": "critical",
+    # Fast path: already canonical (the common case), no allocation needed
+    if isinstance(severity, str):
+        if severity in _VALID_SEVERITIES:
+            return severity
+        return _SEVERITY_MAP.get(severity.lower(), "low")
+    return _SEVERITY_MAP.get(str(severity).lower(), "low") if severity else "low"
+
+
+def _parse_timestamp(value):
+    """Parse timestamp from various formats"""
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value)
+        except (ValueError, OSError) as e:
+            logger.warning(f"Invalid timestamp value {value}: {e}, using current time")
+            return datetime.utcnow()
+    elif isinstance(value, str):
+        try:
+            # Python 3.11+ fromisoformat also accepts the "YYYY-MM-DD HH:MM:SS" form
+            return datetime.fromisoformat(value)
+        except ValueError:
+            logger.warning(f"Could not parse timestamp string: {value}, using current time")
+            return datetime.utcnow()
+    return datetime.utcnow()
+
+
+def _alert_key(alert: dict) -> Optional[str]:
+    """Unique ID "alert_id:device_ip" for an alert, or None if it has no alert_id"""
+    # The same alert_id can be used for different devices, so the IP is part of the key.
+    # Keys recur on every pass, so intern them to share one string per key.
+    alert_id = alert.get("alert_id")
+    if not alert_id:
+        return None
+    return sys.intern(f"{alert_id}:{alert.get('device', {}).get('ip', 'unknown')}")
+
+
+class AlertDoc(TypedDict):
+    """Shape of an alert document in the alerts collection"""
+    _id: str  # "alert_id:device_ip"
+    alert_id: str
+    device_ip: str
+    device_mac: str
+    alert_type: str
+    severity: str
+    timestamp: datetime
+    reason: str
+    details: Dict[str, Any]
+    action_taken: Optional[str]
+    acknowledged: bool
+
+
+def _build_db_alert(alert: dict, unique_id: str) -> AlertDoc:
+    """Build the MongoDB document for an alert read from the alerts file"""
+    device = alert.get("device", {})
+    device_ip = device.get("ip", "unknown")
+    action_taken = alert.get("action_taken")
+    return {
+        "_id": unique_id,
+        "alert_id": alert.get("alert_id"),  # Keep original alert_id for reference
+        "device_ip": device_ip,
+        "device_mac": device.get("mac", "unknown"),
+        "alert_type": "anomaly",
+        "severity": _normalize_severity(alert.get("severity")),
+        "timestamp": _parse_timestamp(alert.get("timestamp")),
+        "reason": alert.get("reason", "Suspicious activity"),
+        "details": {
+            "device_name": device.get("name"),
+            "status": alert.get("status")
+        },
+        "action_taken": orjson.dumps(action_taken).decode() if action_taken else None,
+        "acknowledged": False
     }
-    return severity_map.get(severity_lower, "low")
+
+
+async def _iter_jsonl(path: Path, block_size: int = 1 << 20):
+    """Yield one decoded alert per JSONL line, reading the file in blocks"""
+    line_num = 0
+    pending = b""
+    async with aiofiles.open(path, 'rb') as f:
+        while True:
+            block = await f.read(block_size)
+            if not block:
+                break
+            lines = (pending + block).split(b"\n")
+            pending = lines.pop()  # Possibly incomplete last line
+            for line in lines:
+                line_num += 1
+                line = line.strip()
+                if not line:  # Skip empty lines
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError as line_error:
+                    logger.warning(f"Skipping invalid JSON on line {line_num}: {line_error}")
+    
+    line = pending.strip()
+    if line:
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as line_error:
+            logger.warning(f"Skipping invalid JSON on line {line_num + 1}: {line_error}")
 
 
 class AlertMonitor:
@@ -42,225 +154,237 @@ class AlertMonitor:
         self.monitoring = False
         self.file_path: Optional[Path] = None
         self._monitor_task: Optional[asyncio.Task] = None
+        self._housekeeping_task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._last_stat: Optional[Tuple[int, int]] = None  # (st_mtime_ns, st_size) of last processed file
+        self._last_hash: Optional[bytes] = None  # Content digest of last processed file
+        # File events and housekeeping both run checks; serialize them so an alert isn't claimed twice
+        self._check_lock = asyncio.Lock()
+        # Set when an insert failed, so the next pass re-reads the file and re-checks every id in the DB
+        self._resync_pending = False
         
     async def start(self):
         """Start monitoring alerts file"""
-        import sys
         try:
-            print(f"🔍 Starting alert monitor... ALERTS_FILE_PATH={settings.ALERTS_FILE_PATH}", flush=True)
-            sys.stdout.flush()
             logger.info(f"Starting alert monitor with ALERTS_FILE_PATH={settings.ALERTS_FILE_PATH}")
             
             if not settings.ALERTS_FILE_PATH:
                 logger.warning("ALERTS_FILE_PATH not configured, alert monitoring disabled")
-                print("⚠️  Alert monitoring disabled: ALERTS_FILE_PATH not configured", flush=True)
-                sys.stdout.flush()
                 return
             
             self.file_path = Path(settings.ALERTS_FILE_PATH)
-            print(f"🔍 Checking for alerts file at: {self.file_path}", flush=True)
-            print(f"🔍 File exists: {self.file_path.exists()}", flush=True)
-            sys.stdout.flush()
             
             if not self.file_path.exists():
-                logger.warning(f"Alerts file not found: {self.file_path}")
-                print(f"⚠️  Alert monitoring disabled: alerts file not found at {self.file_path}", flush=True)
-                print(f"🔍 Current working directory: {Path.cwd()}", flush=True)
-                data_dir = Path('/data')
-                if data_dir.exists():
-                    print(f"🔍 /data directory contents: {list(data_dir.iterdir())}", flush=True)
-                else:
-                    print(f"🔍 /data directory does not exist", flush=True)
-                sys.stdout.flush()
+                logger.warning(f"Alert monitoring disabled: alerts file not found at {self.file_path}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    data_dir = Path('/data')
+                    logger.debug(
+                        f"Current working directory: {Path.cwd()}; /data contents: "
+                        f"{list(data_dir.iterdir()) if data_dir.exists() else 'missing'}"
+                    )
                 return
             
             self.monitoring = True
-            print(f"📋 Loading initial alerts from {self.file_path}...", flush=True)
-            sys.stdout.flush()
+            logger.info(f"Loading initial alerts from {self.file_path}")
             # Load initial alerts AND sync to DB
             await self._load_initial_alerts()
-            # Start monitoring task - store it to prevent garbage collection
+            # Start monitoring tasks - store them to prevent garbage collection
+            self._stop = asyncio.Event()
             self._monitor_task = asyncio.create_task(self._monitor_loop())
+            self._housekeeping_task = asyncio.create_task(self._housekeeping_loop())
             logger.info(f"Alert monitoring started for {self.file_path}")
-            print(f"✅ Alert monitoring started for {self.file_path}", flush=True)
-            sys.stdout.flush()
         except Exception as e:
-            logger.error(f"Error starting alert monitor: {e}", exc_info=True)
             # Don't crash the app if monitoring fails to start
-            print(f"⚠️  Alert monitoring failed to start: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-            sys.stdout.flush()
+            logger.error(f"Error starting alert monitor: {e}", exc_info=True)
     
-    def _parse_timestamp(self, value):
-        """Parse timestamp from various formats"""
-        if isinstance(value, (int, float)):
-            try:
-                return datetime.fromtimestamp(value)
-            except (ValueError, OSError) as e:
-                logger.warning(f"Invalid timestamp value {value}: {e}, using current time")
-                return datetime.utcnow()
-        elif isinstance(value, str):
-            try:
-                # Try ISO format first
-                return datetime.fromisoformat(value)
-            except ValueError:
-                try:
-                    # Try "YYYY-MM-DD HH:MM:SS" format
-                    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    logger.warning(f"Could not parse timestamp string: {value}, using current time")
-                    return datetime.utcnow()
-        return datetime.utcnow()
-
     async def _load_initial_alerts(self):
         """Load existing alerts from file and sync to MongoDB"""
         try:
             if not self.file_path or not self.file_path.exists():
                 logger.warning(f"Alerts file not found: {self.file_path}")
-                print(f"⚠️  Alerts file not found: {self.file_path}")
                 return
             
+            # Read without blocking the event loop; startup shouldn't stall on a large file
+            async with aiofiles.open(self.file_path, 'rb') as f:
+                raw = await f.read()
+            
             # Try to read as JSON first (array or single object)
+            alerts = None
             try:
-                with open(self.file_path, 'r') as f:
-                    data = json.load(f)
+                data = orjson.loads(raw)
                     
                 # Handle both array and single object formats
                 if isinstance(data, dict):
                     # Single alert object - convert to array
                     alerts = [data]
                     logger.info("Converted single alert object to array format")
-                    print("ℹ️  Converted single alert object to array format")
                 elif isinstance(data, list):
                     alerts = data
                 else:
-                    logger.warning(f"Alerts file has unsupported format. Got type: {type(data)}")
-                    print(f"⚠️  Alerts file must be an array or object. Current format: {type(data).__name__}")
+                    logger.warning(f"Alerts file must be an array or object. Got type: {type(data).__name__}")
                     return
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 # If JSON parsing fails, try JSONL format (one JSON object per line)
                 logger.info(f"JSON parsing failed, trying JSONL format: {e}")
-                print(f"ℹ️  Trying JSONL format (one JSON object per line)...")
-                alerts = []
-                with open(self.file_path, 'r') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if not line:  # Skip empty lines
-                            continue
-                        try:
-                            alert_obj = json.loads(line)
-                            alerts.append(alert_obj)
-                        except json.JSONDecodeError as line_error:
-                            logger.warning(f"Skipping invalid JSON on line {line_num}: {line_error}")
-                            print(f"⚠️  Skipping invalid JSON on line {line_num}")
+            del raw
+            
+            alerts_collection = get_alerts_collection()
+            count = skipped = errors = 0
+            
+            if alerts is not None:
+                logger.info(f"Processing {len(alerts)} alerts from file")
+                for start in range(0, len(alerts), INITIAL_SYNC_BATCH_SIZE):
+                    synced, already, failed = await self._sync_initial_batch(
+                        alerts_collection, alerts[start:start + INITIAL_SYNC_BATCH_SIZE]
+                    )
+                    count, skipped, errors = count + synced, skipped + already, errors + failed
+            else:
+                # Stream JSONL so peak memory is one batch, not the whole file
+                total = 0
+                batch = []
+                async for alert_data in _iter_jsonl(self.file_path):
+                    batch.append(alert_data)
+                    total += 1
+                    if len(batch) >= INITIAL_SYNC_BATCH_SIZE:
+                        synced, already, failed = await self._sync_initial_batch(alerts_collection, batch)
+                        count, skipped, errors = count + synced, skipped + already, errors + failed
+                        batch = []
+                if batch:
+                    synced, already, failed = await self._sync_initial_batch(alerts_collection, batch)
+                    count, skipped, errors = count + synced, skipped + already, errors + failed
                 
-                if not alerts:
+                if not total:
                     logger.error("No valid alerts found in JSONL format")
-                    print("❌ No valid alerts found in JSONL format")
                     return
                 
-                logger.info(f"Successfully loaded {len(alerts)} alerts from JSONL format")
-                print(f"✅ Loaded {len(alerts)} alerts from JSONL format")
-
-            alerts_collection = get_alerts_collection()
-            count = 0
-            errors = 0
-            skipped = 0
-            
-            logger.info(f"Processing {len(alerts)} alerts from file")
-            print(f"📋 Processing {len(alerts)} alerts from file...")
-            
-            for alert_data in alerts:
-                alert_id = alert_data.get("alert_id")
-                if not alert_id:
-                    skipped += 1
-                    logger.warning("Skipping alert without alert_id")
-                    continue
-                    
-                # Track unique ID (alert_id:device_ip)
-                device = alert_data.get("device", {})
-                device_ip = device.get("ip", "unknown")
-                unique_id = f"{alert_id}:{device_ip}"
-                self.last_alert_ids.add(unique_id)
-                
-                # Sync to MongoDB if missing
-                try:
-                    device = alert_data.get("device", {})
-                    device_ip = device.get("ip", "unknown")
-                    
-                    # Create unique ID by combining alert_id and device_ip
-                    # This handles cases where same alert_id is used for different devices
-                    unique_id = f"{alert_id}:{device_ip}"
-                    
-                    existing = await alerts_collection.find_one({"_id": unique_id})
-                    if existing:
-                        skipped += 1
-                        continue
-                    
-                    timestamp = self._parse_timestamp(alert_data.get("timestamp"))
-                    
-                    db_alert = {
-                        "_id": unique_id,
-                        "alert_id": alert_id,  # Keep original alert_id for reference
-                        "device_id": device_ip,
-                        "device_ip": device_ip,
-                        "device_mac": device.get("mac", "unknown"),
-                        "alert_type": "anomaly",
-                        "severity": _normalize_severity(alert_data.get("severity")),
-                        "timestamp": timestamp,
-                        "reason": alert_data.get("reason", "Suspicious activity"),
-                        "details": {
-                            "device_name": device.get("name"),
-                            "status": alert_data.get("status")
-                        },
-                        "action_taken": json.dumps(alert_data.get("action_taken")) if alert_data.get("action_taken") else None,
-                        "acknowledged": False
-                    }
-                    await alerts_collection.insert_one(db_alert)
-                    count += 1
-                except Exception as e:
-                    errors += 1
-                    logger.error(f"Error syncing initial alert {alert_id}: {e}", exc_info=True)
-                    print(f"❌ Error syncing alert {alert_id}: {e}")
+                logger.info(f"Successfully loaded {total} alerts from JSONL format")
             
             logger.info(f"Alert sync complete: {count} synced, {skipped} skipped, {errors} errors")
-            if count > 0:
-                print(f"✅ Synced {count} existing alerts to MongoDB")
-            if errors > 0:
-                print(f"⚠️  {errors} alerts failed to sync (check logs for details)")
-            if skipped > 0:
-                print(f"ℹ️  {skipped} alerts already existed in MongoDB")
+            self._resync_pending = errors > 0
                     
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in alerts file: {e}", exc_info=True)
-            print(f"❌ Invalid JSON in alerts file: {e}")
         except Exception as e:
             logger.error(f"Error loading initial alerts: {e}", exc_info=True)
-            print(f"❌ Error loading initial alerts: {e}")
-            import traceback
-            traceback.print_exc()
+    
+    async def _sync_initial_batch(self, alerts_collection, alerts: list) -> Tuple[int, int, int]:
+        """Sync one batch of file alerts to MongoDB; returns (synced, skipped, errors)"""
+        skipped = 0
+        
+        keyed = {}
+        for alert_data in alerts:
+            unique_id = _alert_key(alert_data)
+            if unique_id is None:
+                skipped += 1
+                logger.warning("Skipping alert without alert_id")
+                continue
+            keyed.setdefault(unique_id, alert_data)
+        self.last_alert_ids.update(keyed)
+        
+        # One round-trip to find which alerts are already stored
+        existing_ids = {
+            doc["_id"]
+            async for doc in alerts_collection.find({"_id": {"$in": list(keyed)}}, {"_id": 1})
+        }
+        
+        # Sync to MongoDB if missing
+        new_docs = [
+            _build_db_alert(alert_data, unique_id)
+            for unique_id, alert_data in keyed.items()
+            if unique_id not in existing_ids
+        ]
+        skipped += len(alerts) - skipped - len(new_docs)
+        
+        count = await self._insert_alerts(alerts_collection, new_docs)
+        return count, skipped, len(new_docs) - count
+    
+    async def stop(self):
+        """Stop file watching and housekeeping tasks"""
+        self.monitoring = False
+        if self._stop:
+            self._stop.set()
+        for task in (self._monitor_task, self._housekeeping_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._monitor_task = None
+        self._housekeeping_task = None
+    
+    async def _insert_alerts(self, alerts_collection, docs: List[AlertDoc]) -> int:
+        """Insert alert documents in one unordered batch; returns how many were written"""
+        if not docs:
+            return 0
+        try:
+            result = await alerts_collection.insert_many(docs, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Unordered inserts keep going past individual failures; log each one
+            for write_error in e.details.get("writeErrors", []):
+                logger.error(f"Error syncing alert {docs[write_error['index']]['_id']}: {write_error.get('errmsg')}")
+            return e.details.get("nInserted", 0)
     
     async def _monitor_loop(self):
-        """Main monitoring loop - checks file every 2 seconds"""
+        """Main monitoring loop - reacts to filesystem change events on the alerts file"""
+        # Watch the parent directory so atomic replaces (write + rename) are still seen
+        target = self.file_path.resolve()
         while self.monitoring:
             try:
-                await self._check_for_new_alerts()
-                await asyncio.sleep(2)  # Check every 2 seconds
+                async for changes in awatch(
+                    target.parent,
+                    watch_filter=lambda _change, path: Path(path) == target,
+                    stop_event=self._stop,
+                ):
+                    if any(Path(path) == target for _, path in changes):
+                        await self._check_for_new_alerts()
             except Exception as e:
                 logger.error(f"Error in alert monitoring loop: {e}")
-                await asyncio.sleep(5)  # Wait longer on error
+                await asyncio.sleep(5)  # Back off before re-arming the watcher
+    
+    async def _housekeeping_loop(self):
+        """Periodic re-check in case a change event was missed (still gated on stat/hash)"""
+        while self.monitoring:
+            await asyncio.sleep(60)
+            try:
+                await self._check_for_new_alerts()
+            except Exception as e:
+                logger.error(f"Error in alert housekeeping loop: {e}")
     
     async def _check_for_new_alerts(self):
         """Check for new alerts in the file"""
-        if not self.file_path or not self.file_path.exists():
+        if not self.file_path:
             return
+        async with self._check_lock:
+            await self._process_alerts_file()
+    
+    async def _process_alerts_file(self):
+        """Sync and notify alerts added since the last pass; callers hold _check_lock"""
         
+        # Skip the read entirely if the file hasn't changed since the last successful pass
         try:
+            st = self.file_path.stat()
+        except FileNotFoundError:
+            return
+        file_stat = (st.st_mtime_ns, st.st_size)
+        if file_stat == self._last_stat and not self._resync_pending:
+            return
+        
+        try:
+            # Read without blocking the event loop; WebSocket sends keep flowing during the read
+            async with aiofiles.open(self.file_path, 'rb') as f:
+                raw = await f.read()
+            
+            # Producers often rewrite the file with identical content; hashing is far cheaper than parsing
+            content_hash = hashlib.blake2b(raw, digest_size=16).digest()
+            if content_hash == self._last_hash and not self._resync_pending:
+                self._last_stat = file_stat
+                return
+            
             # Try to read as JSON first (array or single object)
             try:
-                with open(self.file_path, 'r') as f:
-                    data = json.load(f)
+                data = orjson.loads(raw)
                 
                 # Handle both array and single object formats
                 if isinstance(data, dict):
@@ -271,150 +395,131 @@ class AlertMonitor:
                 else:
                     logger.warning(f"Alerts file has unsupported format. Got type: {type(data)}")
                     return
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # If JSON parsing fails, try JSONL format (one JSON object per line)
                 alerts = []
-                with open(self.file_path, 'r') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if not line:  # Skip empty lines
-                            continue
-                        try:
-                            alert_obj = json.loads(line)
-                            alerts.append(alert_obj)
-                        except json.JSONDecodeError:
-                            logger.warning(f"Skipping invalid JSON on line {line_num}")
-                            continue
+                for line_num, line in enumerate(raw.splitlines(), 1):
+                    line = line.strip()
+                    if not line:  # Skip empty lines
+                        continue
+                    try:
+                        alert_obj = orjson.loads(line)
+                        alerts.append(alert_obj)
+                    except orjson.JSONDecodeError:
+                        logger.warning(f"Skipping invalid JSON on line {line_num}")
+                        continue
                 
                 if not alerts:
                     logger.warning("No valid alerts found in JSONL format")
                     return
             
             # Find new alerts (by comparing alert_id:device_ip combinations)
-            current_alert_ids = set()
+            keyed = {}
             for alert in alerts:
-                alert_id = alert.get("alert_id")
-                if alert_id:
-                    device = alert.get("device", {})
-                    device_ip = device.get("ip", "unknown")
-                    unique_id = f"{alert_id}:{device_ip}"
-                    current_alert_ids.add(unique_id)
+                unique_id = _alert_key(alert)
+                if unique_id is not None:
+                    keyed.setdefault(unique_id, alert)
+            current_alert_ids = set(keyed)
             
             new_alert_ids = current_alert_ids - self.last_alert_ids
             
             # Process all alerts: sync to MongoDB and send notifications for new ones
             alerts_collection = get_alerts_collection()
-            synced_count = 0
-            notified_count = 0
             
-            for alert in alerts:
-                alert_id = alert.get("alert_id")
-                if not alert_id:
-                    continue
-                
-                device = alert.get("device", {})
-                device_ip = device.get("ip", "unknown")
-                unique_id = f"{alert_id}:{device_ip}"
-                
-                try:
-                    # Always check if alert exists in MongoDB
-                    existing = await alerts_collection.find_one({"_id": unique_id})
-                    
-                    if not existing:
-                        # Alert exists in file but not in DB - sync it
-                        timestamp = self._parse_timestamp(alert.get("timestamp"))
-                        db_alert = {
-                            "_id": unique_id,
-                            "alert_id": alert_id,  # Keep original alert_id for reference
-                            "device_id": device_ip,
-                            "device_ip": device_ip,
-                            "device_mac": device.get("mac", "unknown"),
-                            "alert_type": "anomaly",
-                            "severity": _normalize_severity(alert.get("severity")),
-                            "timestamp": timestamp,
-                            "reason": alert.get("reason", "Suspicious activity"),
-                            "details": {
-                                "device_name": device.get("name"),
-                                "status": alert.get("status")
-                            },
-                            "action_taken": json.dumps(alert.get("action_taken")) if alert.get("action_taken") else None,
-                            "acknowledged": False
-                        }
-                        await alerts_collection.insert_one(db_alert)
-                        synced_count += 1
-                        logger.info(f"Synced alert {unique_id} to MongoDB")
-                        print(f"✅ Synced alert {unique_id} to MongoDB", flush=True)
-                    
-                    # If it's a new alert (not in last_alert_ids), send notification
-                    if unique_id in new_alert_ids:
-                        await self._send_alert_notification(alert)
-                        notified_count += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing alert {unique_id}: {e}", exc_info=True)
-                    print(f"❌ Error processing alert {unique_id}: {e}", flush=True)
+            # Alerts seen on a previous pass were already synced, so only unseen ids need a
+            # DB lookup; after a failed insert everything is re-checked in case a write was lost
+            candidate_ids = current_alert_ids if self._resync_pending else new_alert_ids
+            existing_ids = current_alert_ids - candidate_ids
+            if candidate_ids:
+                existing_ids |= {
+                    doc["_id"]
+                    async for doc in alerts_collection.find({"_id": {"$in": list(candidate_ids)}}, {"_id": 1})
+                }
+            
+            # Alerts in the file but not in DB get synced; new ones also get a notification
+            new_docs = [
+                _build_db_alert(alert, unique_id)
+                for unique_id, alert in keyed.items()
+                if unique_id not in existing_ids
+            ]
+            notify_alerts = [alert for unique_id, alert in keyed.items() if unique_id in new_alert_ids]
+            
+            synced_count = await self._insert_alerts(alerts_collection, new_docs)
+            self._resync_pending = synced_count < len(new_docs)
+            
+            if notify_alerts:
+                await self._send_alert_notifications(notify_alerts)
             
             if synced_count > 0:
                 logger.info(f"Synced {synced_count} alert(s) to MongoDB")
-                print(f"📋 Synced {synced_count} alert(s) to MongoDB", flush=True)
             
             # Update tracked alert IDs
             if new_alert_ids:
                 self.last_alert_ids = current_alert_ids
                 logger.info(f"Detected {len(new_alert_ids)} new alert(s)")
-                print(f"🚨 Detected {len(new_alert_ids)} new alert(s)")
+            
+            # Only remember the stat after a full parse + sync so partial writes get retried
+            self._last_stat = file_stat
+            self._last_hash = content_hash
         
         except json.JSONDecodeError:
             logger.warning(f"Invalid JSON in alerts file: {self.file_path}")
         except Exception as e:
             logger.error(f"Error checking for new alerts: {e}")
     
+    def _build_alert_payload(self, alert_data: dict) -> dict:
+        """Format an alert from the file as a notification payload"""
+        device = alert_data.get("device", {})
+        return {
+            "alert_id": alert_data.get("alert_id"),
+            "device_ip": device.get("ip", "unknown"),
+            "device_name": device.get("name", "Unknown Device"),
+            "severity": alert_data.get("severity", "low"),
+            "reason": alert_data.get("reason", "Suspicious activity detected"),
+            "timestamp": alert_data.get("timestamp"),
+            "action_taken": alert_data.get("action_taken"),
+            "status": alert_data.get("status", "active")
+        }
+    
+    async def _send_alert_notifications(self, alerts: list):
+        """Notify about several new alerts with one WebSocket frame (alerts are already persisted)"""
+        if len(alerts) == 1:
+            await self._send_alert_notification(alerts[0])
+            return
+        
+        try:
+            payloads = [self._build_alert_payload(alert) for alert in alerts]
+            await websocket_manager.send_alerts_batch(payloads)
+            logger.info(f"Sent WebSocket notification for {len(payloads)} alerts")
+            
+            await self._send_alert_emails(*payloads)
+        except Exception as e:
+            logger.error(f"Error processing alert notifications: {e}")
+    
     async def _send_alert_notification(self, alert_data: dict):
         """Send alert notification via WebSocket and Email"""
         try:
-            # Format alert payload
-            device = alert_data.get("device", {})
-            alert_payload = {
-                "alert_id": alert_data.get("alert_id"),
-                "device_ip": device.get("ip", "unknown"),
-                "device_name": device.get("name", "Unknown Device"),
-                "severity": alert_data.get("severity", "low"),
-                "reason": alert_data.get("reason", "Suspicious activity detected"),
-                "timestamp": alert_data.get("timestamp"),
-                "action_taken": alert_data.get("action_taken"),
-                "status": alert_data.get("status", "active")
-            }
+            alert_payload = self._build_alert_payload(alert_data)
             
             # 1. Persist to MongoDB
             try:
                 alerts_collection = get_alerts_collection()
                 
-                # Create unique ID by combining alert_id and device_ip
-                # This handles cases where same alert_id is used for different devices
-                unique_id = f"{alert_payload['alert_id']}:{alert_payload['device_ip']}"
+                unique_id = _alert_key(alert_data)
+                if unique_id is None:
+                    raise ValueError("alert has no alert_id")
                 
-                # Check if already exists
-                existing = await alerts_collection.find_one({"_id": unique_id})
-                if not existing:
-                    # Prepare document for MongoDB
-                    db_alert = {
-                        "_id": unique_id,
-                        "alert_id": alert_payload["alert_id"],  # Keep original alert_id for reference
-                        "device_id": alert_payload["device_ip"], # Use IP as ID fallback
-                        "device_ip": alert_payload["device_ip"],
-                        "device_mac": device.get("mac", "unknown"),
-                        "alert_type": "anomaly", # Default type
-                        "severity": _normalize_severity(alert_payload["severity"]),
-                        "timestamp": self._parse_timestamp(alert_payload["timestamp"]),
-                        "reason": alert_payload["reason"],
-                        "details": {
-                            "device_name": alert_payload["device_name"],
-                            "status": alert_payload["status"]
-                        },
-                        "action_taken": json.dumps(alert_payload["action_taken"]) if alert_payload["action_taken"] else None,
-                        "acknowledged": False
-                    }
-                    await alerts_collection.insert_one(db_alert)
+                # Prepare document for MongoDB (_id comes from the upsert filter)
+                db_alert = _build_db_alert(alert_data, unique_id)
+                del db_alert["_id"]
+                
+                # Insert only if missing; idempotent and race-free with the sync paths
+                result = await alerts_collection.update_one(
+                    {"_id": unique_id},
+                    {"$setOnInsert": db_alert},
+                    upsert=True
+                )
+                if result.upserted_id is not None:
                     logger.info(f"Persisted alert {unique_id} to MongoDB")
             except Exception as e:
                 logger.error(f"Error persisting alert to MongoDB: {e}")
@@ -424,24 +529,38 @@ class AlertMonitor:
             logger.info(f"Sent WebSocket notification for alert: {alert_payload.get('alert_id')}")
             
             # 3. Send via Email
-            try:
-                users_collection = get_users_collection()
-                # Find admins who have notifications enabled
+            await self._send_alert_emails(alert_payload)
+        
+        except Exception as e:
+            logger.error(f"Error processing alert notification: {e}")
+    
+    async def _send_alert_emails(self, *alert_payloads: dict):
+        """Email alerts to admins who have notifications enabled (all alerts sent concurrently)"""
+        try:
+            users_collection = get_users_collection()
+            # Find admins who have notifications enabled
+            emails = [
+                user["email"]
                 async for user in users_collection.find({
                     "role": "admin",
                     "preferences.notifications_enabled": True
-                }):
-                    if user.get("email"):
-                        logger.info(f"Sending email alert to {user['email']}")
-                        print(f"📧 Sending email alert to {user['email']}")
-                        ok = email_service.send_alert_email(user["email"], alert_payload)
-                        print(f"📧 Email send result to {user['email']}: {ok}")
-            except Exception as e:
-                logger.error(f"Error sending email notifications: {e}")
-                print(f"⚠️  Error while sending email notifications: {e}")
-        
+                }, {"email": 1, "_id": 0})
+                if user.get("email")
+            ]
+            
+            if not emails:
+                return
+            
+            # One message per alert to all admins (single DATA upload each); SMTP runs off the
+            # event loop, so the sends for a batch overlap on the email worker pool
+            results = await asyncio.gather(
+                *(email_service.asend_alert_email(emails, payload) for payload in alert_payloads),
+                return_exceptions=True
+            )
+            for payload, ok in zip(alert_payloads, results):
+                logger.info(f"Email send result for alert {payload.get('alert_id')} to {', '.join(emails)}: {ok}")
         except Exception as e:
-            logger.error(f"Error processing alert notification: {e}")
+            logger.error(f"Error sending email notifications: {e}")
 
 
 # Global instance
@@ -1,87 +1,76 @@
+import asyncio
+import atexit
 import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import base64
+from email.header import Header
 from config import settings
-from typing import List, Optional
+from typing import Dict, Final, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
-class EmailService:
-    def __init__(self):
-        self.host = settings.EMAIL_HOST
-        self.port = settings.EMAIL_PORT
-        self.user = settings.EMAIL_USER
-        # Gmail App Passwords are often copied with spaces (e.g. "abcd efgh ijkl mnop").
-        # SMTP auth expects the raw value, so normalize it here.
-        self.password = (settings.EMAIL_PASSWORD or "").replace(" ", "")
-        # If EMAIL_FROM isn't set or is left as the default, fall back to the SMTP user.
-        self.sender = settings.EMAIL_FROM or (self.user or "noreply@homeguard.local")
-        self.enabled = settings.EMAIL_ENABLED
+# Blocking SMTP sends run here so they never hold up request handlers or the event loop
+_executor = ThreadPoolExecutor(max_workers=settings.EMAIL_WORKERS, thread_name_prefix="email")
 
-    def send_email(self, to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> bool:
-        """
-        Send an email to a recipient
-        """
-        if not self.enabled or not self.user or not self.password:
-            logger.warning("Email service is disabled or not configured")
-            return False
+# Fixed multipart boundary; it can't collide with base64 body lines (which never start with "--")
+_BOUNDARY = "==HomeGuard-alternative-boundary=="
 
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = self.sender
-            msg["To"] = to_email
-
-            # Attach plain text body
-            msg.attach(MIMEText(body, "plain"))
-
-            # Attach HTML body if provided
-            if html_body:
-                msg.attach(MIMEText(html_body, "html"))
-
-            # Connect to SMTP server
-            with smtplib.SMTP(self.host, self.port) as server:
-                server.starttls()
-                server.login(self.user, self.password)
-                server.sendmail(self.sender, to_email, msg.as_string())
-
-            logger.info(f"Email sent successfully to {to_email}")
-            print(f"✅ Email sent successfully to {to_email}")
-            return True
 
-        except Exception as e:
-            logger.error(f"Failed to send email to {to_email}: {e}")
-            print(f"❌ Failed to send email to {to_email}: {e}")
-            return False
+def _b64_part(content_type: str, text: str) -> bytes:
+    """One MIME body part, UTF-8 text base64-encoded into 76-char CRLF lines"""
+    encoded = base64.encodebytes(text.encode("utf-8")).replace(b"\n", b"\r\n")
+    return (
+        f"Content-Type: {content_type}; charset=utf-8\r\n"
+        "Content-Transfer-Encoding: base64\r\n\r\n"
+    ).encode("ascii") + encoded
 
-    def send_alert_email(self, to_email: str, alert_data: dict) -> bool:
-        """
-        Send a formatted security alert email
-        """
-        subject = f"🚨 HomeGuard Alert: {alert_data.get('reason', 'Security Alert')}"
-        
-        # Plain text version
-        body = f"""
+
+def _build_mime_bytes(sender: str, to: str, subject: str, text: str, html: Optional[str] = None) -> bytes:
+    """Assemble a plain or multipart/alternative message directly as bytes"""
+    # Every line below ends in CRLF; a raw CR/LF in a header value would put a bare line break
+    # on the wire (rejected by strict relays such as Gmail) or inject headers
+    for name, value in (("From", sender), ("To", to)):
+        if "\r" in value or "\n" in value:
+            raise ValueError(f"Line break in {name} header")
+    # Subjects embed alert text, so flatten any line breaks rather than refuse the alert
+    subject = " ".join(subject.split())
+    # Long subjects are folded; fold with CRLF since smtplib doesn't normalise bytes messages
+    encoded_subject = Header(subject, "utf-8").encode(linesep="\r\n")
+    headers = (
+        f"From: {sender}\r\n"
+        f"To: {to}\r\n"
+        f"Subject: {encoded_subject}\r\n"
+        "MIME-Version: 1.0\r\n"
+    ).encode("utf-8")
+    if not html:
+        return headers + _b64_part("text/plain", text)
+    delimiter = f"--{_BOUNDARY}\r\n".encode("ascii")
+    return b"".join((
+        headers,
+        f'Content-Type: multipart/alternative; boundary="{_BOUNDARY}"\r\n\r\n'.encode("ascii"),
+        delimiter, _b64_part("text/plain", text), b"\r\n",
+        delimiter, _b64_part("text/html", html), b"\r\n",
+        f"--{_BOUNDARY}--\r\n".encode("ascii"),
+    ))
+
+
+class EmailService:
+    # Alert email templates, filled with str.format_map per alert
+    _TEXT_TEMPLATE = """
         HOMEGUARD SECURITY ALERT
         
-        Severity: {alert_data.get('severity', 'UNKNOWN').upper()}
-        Reason: {alert_data.get('reason')}
-        Device: {alert_data.get('device_name') or alert_data.get('device_ip')}
-        Time: {alert_data.get('timestamp')}
+        Severity: {severity_upper}
+        Reason: {reason}
+        Device: {device}
+        Time: {timestamp}
         
         Please check your dashboard for more details.
         """
-        
-        # HTML version
-        severity_color = {
-            "critical": "#ef4444",
-            "high": "#f97316",
-            "medium": "#eab308",
-            "low": "#3b82f6"
-        }.get(alert_data.get('severity', 'medium').lower(), "#6b7280")
-        
-        html_body = f"""
+
+    _HTML_TEMPLATE = """
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <div style="max-width: 600px; margin: 0 auto; border: 1px solid #e5e7eb; border-radius: 8px; overflow: hidden;">
@@ -89,23 +78,23 @@ class EmailService:
                     <h1 style="margin: 0;">Security Alert</h1>
                 </div>
                 <div style="padding: 24px;">
-                    <h2 style="margin-top: 0; color: #1f2937;">{alert_data.get('reason')}</h2>
+                    <h2 style="margin-top: 0; color: #1f2937;">{reason}</h2>
                     <table style="width: 100%; border-collapse: collapse;">
                         <tr>
                             <td style="padding: 8px 0; color: #6b7280;">Severity:</td>
-                            <td style="padding: 8px 0; font-weight: bold; text-transform: uppercase; color: {severity_color};">{alert_data.get('severity')}</td>
+                            <td style="padding: 8px 0; font-weight: bold; text-transform: uppercase; color: {severity_color};">{severity}</td>
                         </tr>
                         <tr>
                             <td style="padding: 8px 0; color: #6b7280;">Device:</td>
-                            <td style="padding: 8px 0; font-weight: bold;">{alert_data.get('device_name') or alert_data.get('device_ip')}</td>
+                            <td style="padding: 8px 0; font-weight: bold;">{device}</td>
                         </tr>
                         <tr>
                             <td style="padding: 8px 0; color: #6b7280;">Time:</td>
-                            <td style="padding: 8px 0;">{alert_data.get('timestamp')}</td>
+                            <td style="padding: 8px 0;">{timestamp}</td>
                         </tr>
                     </table>
                     <div style="margin-top: 24px; text-align: center;">
-                        <a href="{settings.FRONTEND_URL}" style="display: inline-block; background-color: #3b82f6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold;">View Dashboard</a>
+                        <a href="{dashboard_url}" style="display: inline-block; background-color: #3b82f6; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold;">View Dashboard</a>
                     </div>
                 </div>
                 <div style="background-color: #f9fafb; padding: 16px; text-align: center; font-size: 12px; color: #6b7280;">
@@ -115,8 +104,205 @@ class EmailService:
         </body>
         </html>
         """
+
+    _SEVERITY_COLORS: Final[Dict[str, str]] = {
+        "critical": "#ef4444",
+        "high": "#f97316",
+        "medium": "#eab308",
+        "low": "#3b82f6"
+    }
+    _DEFAULT_COLOR: Final[str] = "#6b7280"
+
+    def __init__(self):
+        self.host = settings.EMAIL_HOST
+        self.port = settings.EMAIL_PORT
+        self.user = settings.EMAIL_USER
+        # Gmail App Passwords are often copied with spaces (e.g. "abcd efgh ijkl mnop").
+        # SMTP auth expects the raw value, so normalize it here.
+        self.password = (settings.EMAIL_PASSWORD or "").replace(" ", "")
+        # If EMAIL_FROM isn't set or is left as the default, fall back to the SMTP user.
+        self.sender = settings.EMAIL_FROM or (self.user or "noreply@homeguard.local")
+        self.enabled = settings.EMAIL_ENABLED
+        # Settings are fixed for the process, so decide once whether sending is possible
+        self._ready = bool(self.enabled and self.user and self.password)
+
+        # Each sending thread keeps its own SMTP session (STARTTLS + login only on (re)connect)
+        self._local = threading.local()
+        self._conns: Dict[int, smtplib.SMTP] = {}  # All open sessions by thread, for shutdown
+        self._conns_lock = threading.Lock()
+        self._max_per_conn = 100
+        # Sessions idle longer than this get a NOOP before reuse; servers drop idle clients after a while
+        self._idle_probe_after = 30.0
+        # Bound queued + in-flight background sends so a burst can't grow without limit
+        self._backlog = threading.BoundedSemaphore(settings.EMAIL_QUEUE_SIZE)
+        atexit.register(self._close)
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open an authenticated SMTP session"""
+        # Connect timeout also bounds the wait for the server greeting
+        server = smtplib.SMTP(self.host, self.port, timeout=settings.EMAIL_CONNECT_TIMEOUT)
+        try:
+            server.starttls()
+            # Longer deadline for each read/write once the session is up
+            server.sock.settimeout(settings.EMAIL_IO_TIMEOUT)
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _get_conn(self) -> smtplib.SMTP:
+        """Return this thread's live SMTP session, reconnecting if needed"""
+        conn = getattr(self._local, "conn", None)
+        # Only probe a session that sat idle; a busy session is checked by the send itself
+        if conn is not None and time.monotonic() - self._local.last_used > self._idle_probe_after:
+            try:
+                if conn.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except (smtplib.SMTPException, OSError):
+                self._drop_conn()
+                conn = None
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.sent = 0
+            self._local.last_used = time.monotonic()
+            with self._conns_lock:
+                self._conns[threading.get_ident()] = conn
+        return conn
+
+    def _sendmail(self, to_emails: List[str], msg: bytes):
+        """Send on this thread's session, replacing a reused session the server has closed once"""
+        reused = getattr(self._local, "conn", None) is not None
+        try:
+            self._get_conn().sendmail(self.sender, to_emails, msg)
+        except smtplib.SMTPServerDisconnected:
+            self._drop_conn()
+            if not reused:
+                raise
+            self._get_conn().sendmail(self.sender, to_emails, msg)
+        self._local.last_used = time.monotonic()
+
+    def _drop_conn(self):
+        """Close this thread's SMTP session"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            with self._conns_lock:
+                self._conns.pop(threading.get_ident(), None)
+            self._quit(conn)
+
+    @staticmethod
+    def _quit(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def _close(self):
+        """Close all pooled SMTP sessions on shutdown"""
+        with self._conns_lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+        for conn in conns:
+            self._quit(conn)
+
+    def _submit(self, fn, *args) -> Optional[Future]:
+        """Queue a blocking send on the email worker pool; None if disabled or the backlog is full"""
+        if not self._ready:
+            logger.warning("Email service is disabled or not configured")
+            return None
+        if not self._backlog.acquire(blocking=False):
+            logger.warning(f"Email backlog full, dropping email to {args[0]}")
+            return None
+        future = _executor.submit(fn, *args)
+        future.add_done_callback(lambda _f: self._backlog.release())
+        return future
+
+    def send_email(self, to_emails: Union[List[str], str], subject: str, body: str, html_body: Optional[str] = None) -> bool:
+        """
+        Send an email to one or more recipients (one DATA upload for all of them)
+        """
+        if isinstance(to_emails, str):
+            to_emails = [to_emails]
+        recipients = ", ".join(to_emails)
+        if not self._ready:
+            logger.warning("Email service is disabled or not configured")
+            return False
+
+        try:
+            msg = _build_mime_bytes(self.sender, recipients, subject, body, html_body)
+
+            # Reuse this thread's SMTP session; recycle it after _max_per_conn messages
+            try:
+                self._sendmail(to_emails, msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # Includes socket timeouts: the session is in an unknown state, reconnect next time
+                self._drop_conn()
+                raise
+            self._local.sent += 1
+            if self._local.sent >= self._max_per_conn:
+                self._drop_conn()
+
+            logger.info(f"Email sent successfully to {recipients}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to send email to {recipients}: {e}")
+            return False
+
+    def send_email_async(self, to_emails: Union[List[str], str], subject: str, body: str, html_body: Optional[str] = None) -> Optional[Future]:
+        """
+        Queue an email on the worker pool (fire-and-forget); returns None if dropped
+        """
+        return self._submit(self.send_email, to_emails, subject, body, html_body)
+
+    def send_alert_email_async(self, to_emails: Union[List[str], str], alert_data: dict) -> Optional[Future]:
+        """
+        Queue a formatted security alert email on the worker pool; returns None if dropped
+        """
+        return self._submit(self.send_alert_email, to_emails, alert_data)
+
+    async def asend_email(self, to_emails: Union[List[str], str], subject: str, body: str, html_body: Optional[str] = None) -> bool:
+        """
+        Send an email from the worker pool and await the result
+        """
+        future = self.send_email_async(to_emails, subject, body, html_body)
+        return await asyncio.wrap_future(future) if future else False
+
+    async def asend_alert_email(self, to_emails: Union[List[str], str], alert_data: dict) -> bool:
+        """
+        Send a formatted security alert email from the worker pool and await the result
+        """
+        future = self.send_alert_email_async(to_emails, alert_data)
+        return await asyncio.wrap_future(future) if future else False
+
+    def send_alert_email(self, to_emails: Union[List[str], str], alert_data: dict) -> bool:
+        """
+        Send a formatted security alert email
+        """
+        # Skip rendering the templates entirely when nothing would be sent
+        if not self._ready:
+            logger.warning("Email service is disabled or not configured")
+            return False
+
+        subject = f"🚨 HomeGuard Alert: {alert_data.get('reason', 'Security Alert')}"
+        
+        severity = alert_data.get('severity')
+        ctx = {
+            "reason": alert_data.get('reason'),
+            "severity": severity,
+            "severity_upper": (severity or 'UNKNOWN').upper(),
+            "severity_color": self._SEVERITY_COLORS.get((severity or 'medium').lower(), self._DEFAULT_COLOR),
+            "device": alert_data.get('device_name') or alert_data.get('device_ip'),
+            "timestamp": alert_data.get('timestamp'),
+            "dashboard_url": settings.FRONTEND_URL,
+        }
+        
+        body = self._TEXT_TEMPLATE.format_map(ctx)
+        html_body = self._HTML_TEMPLATE.format_map(ctx)
         
-        return self.send_email(to_email, subject, body, html_body)
+        return self.send_email(to_emails, subject, body, html_body)
 
 email_service = EmailService()
 
@@ -1,15 +1,38 @@
 """
 Firewall Controller - Uses bash scripts for blocking/unblocking devices
 """
+import asyncio
 import subprocess
 import logging
 import os
+import re
+import time
 from pathlib import Path
 from typing import List, Dict, Optional
 from config import settings
 
+try:
+    # libnftables bindings ship with the system nftables package, not on PyPI
+    from nftables import Nftables
+except ImportError:
+    Nftables = None
+
 logger = logging.getLogger(__name__)
 
+# Same table/set the block/unblock scripts use
+NFT_FAMILY = "inet"
+NFT_TABLE = "homefw"
+NFT_BLOCKED_SET = "malicious_devices"
+
+# Element list in `nft list set` output: elements = { 10.10.0.11, 192.168.1.100 }
+_SET_ELEMENTS_RE = re.compile(r"elements\s*=\s*\{([^}]*)\}")
+
+# Seconds a block/unblock script may run before it is killed
+SCRIPT_TIMEOUT = 10
+
+# Seconds before the cached blocked set is re-synced from nftables
+BLOCKED_SET_TTL = 60
+
 
 class FirewallController:
     """Manages firewall rules using bash scripts"""
@@ -19,6 +42,20 @@ class FirewallController:
         self.chain_name = settings.NFTABLES_CHAIN
         self.blocked_devices: Dict[str, Dict[str, str]] = {}  # MAC -> {ip, reason}
         
+        # In-process libnftables handle for read-only queries (None -> shell out to nft)
+        self._nft = None
+        if Nftables is not None:
+            try:
+                self._nft = Nftables()
+                self._nft.set_json_output(True)
+            except Exception as e:
+                logger.warning(f"libnftables unavailable, falling back to nft CLI: {e}")
+                self._nft = None
+        
+        # Cached contents of the blocked set (seeded in _initialize_firewall)
+        self._blocked_ips: set = set()
+        self._blocked_ips_synced_at = 0.0
+        
         # Script paths - try multiple locations
         self.block_script = self._find_script("block_ip.sh")
         self.unblock_script = self._find_script("unblock.sh")
@@ -28,28 +65,38 @@ class FirewallController:
     
     def _find_script(self, script_name: str) -> Optional[str]:
         """Find the script in common locations"""
-        possible_paths = [
-            f"/scripts/{script_name}",  # Mounted in container
-            f"/home/orangepi/scripts/{script_name}",  # Host path (if mounted)
-            f"/app/scripts/{script_name}",  # In container
-            script_name,  # Current directory or PATH
+        search_dirs = [
+            "/scripts",  # Mounted in container
+            "/home/orangepi/scripts",  # Host path (if mounted)
+            "/app/scripts",  # In container
+            ".",  # Current directory
         ]
         
-        for path in possible_paths:
-            if os.path.exists(path):
-                # Check if executable
-                if os.access(path, os.X_OK):
-                    logger.info(f"Found {script_name} at: {path} (executable)")
-                    print(f"✅ Found {script_name} at: {path} (executable)", flush=True)
-                    return path
-                else:
-                    logger.warning(f"Found {script_name} at: {path} but not executable")
-                    print(f"⚠️  Found {script_name} at: {path} but not executable", flush=True)
+        for directory in search_dirs:
+            # One directory read per candidate; DirEntry caches the stat result
+            try:
+                with os.scandir(directory) as it:
+                    entry = next((e for e in it if e.name == script_name), None)
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+            if entry is None:
+                logger.debug(f"Script not found in: {directory}")
+                continue
+            
+            # Absolute so the script can be exec'd directly regardless of cwd
+            path = os.path.abspath(entry.path)
+            # Check if executable
+            try:
+                executable = entry.is_file() and bool(entry.stat().st_mode & 0o111)
+            except OSError:
+                executable = False
+            if executable:
+                logger.info(f"Found {script_name} at: {path} (executable)")
+                return path
             else:
-                logger.debug(f"Script not found at: {path}")
+                logger.warning(f"Found {script_name} at: {path} but not executable")
         
         logger.error(f"Script {script_name} not found in any standard locations")
-        print(f"❌ Script {script_name} not found in any standard locations", flush=True)
         return None
     
     def _initialize_firewall(self):
@@ -58,27 +105,22 @@ class FirewallController:
             logger.info("Initializing HomeGuard firewall...")
             
             if self.block_script and self.unblock_script:
-                print(f"✅ Firewall scripts found: {self.block_script}, {self.unblock_script}", flush=True)
-                # Test if scripts are accessible
-                script_dir = os.path.dirname(self.block_script)
-                if os.path.exists(script_dir):
-                    print(f"✅ Script directory exists: {script_dir}", flush=True)
-                    # List files in script directory
+                logger.info(f"Firewall scripts found: {self.block_script}, {self.unblock_script}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    script_dir = os.path.dirname(self.block_script)
                     try:
-                        files = os.listdir(script_dir)
-                        print(f"📁 Files in {script_dir}: {files}", flush=True)
-                    except Exception as e:
-                        print(f"⚠️  Cannot list files in {script_dir}: {e}", flush=True)
+                        logger.debug(f"Files in {script_dir}: {os.listdir(script_dir)}")
+                    except OSError as e:
+                        logger.debug(f"Cannot list files in {script_dir}: {e}")
             else:
-                print(f"⚠️  Firewall scripts not found - blocking may not work", flush=True)
-                if not self.block_script:
-                    print(f"❌ block_ip.sh not found", flush=True)
-                if not self.unblock_script:
-                    print(f"❌ unblock.sh not found", flush=True)
+                # _find_script has already logged which script is missing
+                logger.warning("Firewall scripts not found - blocking may not work")
+            
+            # Seed the blocked-set cache once so status lookups don't each query nftables
+            self._refresh_blocked_ips()
             
         except Exception as e:
-            logger.warning(f"Firewall initialization warning: {e}")
-            print(f"⚠️  Firewall initialization skipped: {e}", flush=True)
+            logger.warning(f"Firewall initialization skipped: {e}")
     
     def block_device(self, ip: str, mac: str, reason: str = "Anomaly detected") -> bool:
         """
@@ -93,60 +135,26 @@ class FirewallController:
             True if successful, False otherwise
         """
         try:
-            if not self.block_script:
-                logger.error("Block script not found")
-                return False
-            
-            if not ip:
-                logger.error("No IP address provided")
+            if not self._check_script_args(self.block_script, "Block", ip):
                 return False
-            
-            # Get script directory and name
-            script_dir = os.path.dirname(self.block_script)
-            script_name = os.path.basename(self.block_script)
-            
-            logger.info(f"Executing block script: ./{script_name} {ip} in directory: {script_dir}")
-            print(f"🔧 Executing: cd {script_dir} && ./{script_name} {ip}", flush=True)
-            
-            # Execute the block script with ./block_ip.sh <ip> format
-            result = subprocess.run(
-                f"./{script_name} {ip}",
-                cwd=script_dir,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            # Log full output for debugging
-            logger.info(f"Script return code: {result.returncode}")
-            logger.info(f"Script stdout: {result.stdout}")
-            logger.info(f"Script stderr: {result.stderr}")
-            print(f"📊 Script return code: {result.returncode}", flush=True)
-            if result.stdout:
-                print(f"📤 Script stdout: {result.stdout.strip()}", flush=True)
-            if result.stderr:
-                print(f"📥 Script stderr: {result.stderr.strip()}", flush=True)
-            
-            if result.returncode == 0:
-                # Store blocked device info
-                self.blocked_devices[mac] = {
-                    "ip": ip,
-                    "reason": reason,
-                    "script": self.block_script
-                }
-                
-                logger.info(f"Blocked device: {ip} ({mac}) - {reason}")
-                print(f"🚫 Blocked device: {ip} ({mac}) - {reason}", flush=True)
-                if result.stdout:
-                    logger.info(f"Script output: {result.stdout.strip()}")
-                return True
-            else:
-                error_msg = result.stderr.strip() or result.stdout.strip() or "Unknown error"
-                logger.error(f"Failed to block device {ip}: {error_msg}")
-                print(f"❌ Failed to block device {ip}: {error_msg}", flush=True)
+            result = self._run_script(self.block_script, ip)
+            return self._handle_block_result(ip, mac, reason, result)
+        except subprocess.TimeoutExpired:
+            logger.error(f"Block script timeout for IP: {ip}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to block device {ip}: {e}", exc_info=True)
+            return False
+    
+    async def block_device_async(self, ip: str, mac: str, reason: str = "Anomaly detected") -> bool:
+        """
+        Block a device without blocking the event loop (same result handling as block_device)
+        """
+        try:
+            if not self._check_script_args(self.block_script, "Block", ip):
                 return False
-            
+            result = await self._run_script_async(self.block_script, ip)
+            return self._handle_block_result(ip, mac, reason, result)
         except subprocess.TimeoutExpired:
             logger.error(f"Block script timeout for IP: {ip}")
             return False
@@ -154,6 +162,80 @@ class FirewallController:
             logger.error(f"Failed to block device {ip}: {e}", exc_info=True)
             return False
     
+    def _handle_block_result(self, ip: str, mac: str, reason: str, result: subprocess.CompletedProcess) -> bool:
+        """Record the outcome of a block_ip.sh run"""
+        if result.returncode == 0:
+            # Store blocked device info
+            self.blocked_devices[mac] = {
+                "ip": ip,
+                "reason": reason,
+                "script": self.block_script
+            }
+            self._blocked_ips.add(ip)
+            
+            logger.info(f"Blocked device: {ip} ({mac}) - {reason}")
+            return True
+        else:
+            error_msg = result.stderr.strip() or result.stdout.strip() or "Unknown error"
+            logger.error(f"Failed to block device {ip}: {error_msg}")
+            return False
+    
+    @staticmethod
+    def _check_script_args(script: Optional[str], action: str, ip: str) -> bool:
+        """Log and reject a block/unblock call that can't run"""
+        if not script:
+            logger.error(f"{action} script not found")
+            return False
+        if not ip:
+            logger.error("No IP address provided")
+            return False
+        return True
+    
+    @staticmethod
+    def _log_script_result(result: subprocess.CompletedProcess):
+        """Log full script output for debugging"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Script return code: {result.returncode}")
+            logger.debug(f"Script stdout: {result.stdout.strip()}")
+            logger.debug(f"Script stderr: {result.stderr.strip()}")
+    
+    def _run_script(self, script: str, ip: str) -> subprocess.CompletedProcess:
+        """Run a firewall script with the IP as its only argument"""
+        logger.debug(f"Executing script: {script} {ip}")
+        # Exec the script directly with the IP as an argument (no shell);
+        # its directory stays the working directory in case it uses relative paths
+        result = subprocess.run(
+            [script, ip],
+            cwd=os.path.dirname(script),
+            capture_output=True,
+            text=True,
+            timeout=SCRIPT_TIMEOUT
+        )
+        self._log_script_result(result)
+        return result
+    
+    async def _run_script_async(self, script: str, ip: str) -> subprocess.CompletedProcess:
+        """Async counterpart of _run_script; raises subprocess.TimeoutExpired the same way"""
+        logger.debug(f"Executing script: {script} {ip}")
+        proc = await asyncio.create_subprocess_exec(
+            script, ip,
+            cwd=os.path.dirname(script),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), SCRIPT_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired([script, ip], SCRIPT_TIMEOUT)
+        result = subprocess.CompletedProcess(
+            [script, ip], proc.returncode,
+            stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        )
+        self._log_script_result(result)
+        return result
+    
     def unblock_device(self, ip: str, mac: str) -> bool:
         """
         Unblock a device by IP address using unblock.sh script
@@ -166,106 +248,79 @@ class FirewallController:
             True if successful, False otherwise
         """
         try:
-            if not self.unblock_script:
-                logger.error("Unblock script not found")
+            if not self._check_script_args(self.unblock_script, "Unblock", ip):
                 return False
-            
-            if not ip:
-                logger.error("No IP address provided")
+            result = self._run_script(self.unblock_script, ip)
+            return self._handle_unblock_result(ip, mac, result)
+        except subprocess.TimeoutExpired:
+            logger.error(f"Unblock script timeout for IP: {ip}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to unblock device {ip}: {e}", exc_info=True)
+            return False
+    
+    async def unblock_device_async(self, ip: str, mac: str) -> bool:
+        """
+        Unblock a device without blocking the event loop (same result handling as unblock_device)
+        """
+        try:
+            if not self._check_script_args(self.unblock_script, "Unblock", ip):
                 return False
+            result = await self._run_script_async(self.unblock_script, ip)
+            return self._handle_unblock_result(ip, mac, result)
+        except subprocess.TimeoutExpired:
+            logger.error(f"Unblock script timeout for IP: {ip}")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to unblock device {ip}: {e}", exc_info=True)
+            return False
+    
+    def _handle_unblock_result(self, ip: str, mac: str, result: subprocess.CompletedProcess) -> bool:
+        """Interpret an unblock.sh run and update the tracked state"""
+        # Check both return code and script output for success/error
+        script_output = result.stdout.strip() if result.stdout else ""
+        script_stderr = result.stderr.strip() if result.stderr else ""
+        
+        # Check for explicit success/error messages in output
+        has_success = "[SUCCESS]" in script_output
+        has_error = "[ERROR]" in script_output
+        
+        if result.returncode == 0 and has_success:
+            # Successfully unblocked
+            if mac in self.blocked_devices:
+                del self.blocked_devices[mac]
+            self._blocked_ips.discard(ip)
             
-            # Get script directory and name
-            script_dir = os.path.dirname(self.unblock_script)
-            script_name = os.path.basename(self.unblock_script)
-            
-            logger.info(f"Executing unblock script: ./{script_name} {ip} in directory: {script_dir}")
-            print(f"🔧 Executing: cd {script_dir} && ./{script_name} {ip}", flush=True)
-            
-            # Execute the unblock script with ./unblock.sh <ip> format
-            result = subprocess.run(
-                f"./{script_name} {ip}",
-                cwd=script_dir,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            # Log full output for debugging
-            logger.info(f"Script return code: {result.returncode}")
-            logger.info(f"Script stdout: {result.stdout}")
-            logger.info(f"Script stderr: {result.stderr}")
-            print(f"📊 Script return code: {result.returncode}", flush=True)
-            if result.stdout:
-                print(f"📤 Script stdout: {result.stdout.strip()}", flush=True)
-            if result.stderr:
-                print(f"📥 Script stderr: {result.stderr.strip()}", flush=True)
-            
-            # Check both return code and script output for success/error
-            script_output = result.stdout.strip() if result.stdout else ""
-            script_stderr = result.stderr.strip() if result.stderr else ""
-            
-            # Check for explicit success/error messages in output
-            has_success = "[SUCCESS]" in script_output
-            has_error = "[ERROR]" in script_output
+            logger.info(f"Unblocked device: {ip} ({mac})")
+            return True
+        elif has_error or result.returncode != 0:
+            # Script reported error or non-zero exit code
+            error_msg = script_stderr or script_output or "Unknown error"
             
-            if result.returncode == 0 and has_success:
-                # Successfully unblocked
+            # Check if the error is because IP is not in the set (already unblocked)
+            # This can happen if the IP was blocked by AI agent using a different method
+            # or if it was already removed from the set
+            if "not in set" in error_msg.lower() or "does not exist" in error_msg.lower() or "no such file" in error_msg.lower() or "Failed to unblock" in error_msg:
+                # IP is not in the blocked set - device is effectively already unblocked
+                logger.info(f"IP {ip} is not in blocked set - device is already unblocked")
+                # Remove from tracked blocked devices if present
                 if mac in self.blocked_devices:
                     del self.blocked_devices[mac]
-                
-                logger.info(f"Unblocked device: {ip} ({mac})")
-                print(f"✅ Unblocked device: {ip} ({mac})", flush=True)
-                if script_output:
-                    logger.info(f"Script output: {script_output}")
-                return True
-            elif has_error or result.returncode != 0:
-                # Script reported error or non-zero exit code
-                error_msg = script_stderr or script_output or "Unknown error"
-                
-                # Check if the error is because IP is not in the set (already unblocked)
-                # This can happen if the IP was blocked by AI agent using a different method
-                # or if it was already removed from the set
-                if "not in set" in error_msg.lower() or "does not exist" in error_msg.lower() or "no such file" in error_msg.lower() or "Failed to unblock" in error_msg:
-                    # IP is not in the blocked set - device is effectively already unblocked
-                    logger.info(f"IP {ip} is not in blocked set - device is already unblocked")
-                    print(f"ℹ️  IP {ip} is not in blocked set - device is already unblocked (error: {error_msg})", flush=True)
-                    # Remove from tracked blocked devices if present
-                    if mac in self.blocked_devices:
-                        del self.blocked_devices[mac]
-                    return True  # Consider it successful since device is not blocked
-                else:
-                    # Real error occurred
-                    logger.error(f"Failed to unblock device {ip}: {error_msg}")
-                    print(f"❌ Failed to unblock device {ip}: {error_msg}", flush=True)
-                    return False
-                # or if it was already manually removed
-                if "No such file" in error_msg or "not found" in error_msg.lower() or "does not exist" in error_msg.lower():
-                    logger.warning(f"IP {ip} may not be in the blocked set (possibly already unblocked)")
-                    print(f"⚠️  IP {ip} may not be in the blocked set - treating as already unblocked", flush=True)
-                    # Remove from blocked devices tracking since it's effectively unblocked
-                    if mac in self.blocked_devices:
-                        del self.blocked_devices[mac]
-                    # Return True since the end goal (device unblocked) is achieved
-                    return True
-                
-                return False
+                self._blocked_ips.discard(ip)
+                return True  # Consider it successful since device is not blocked
             else:
-                # Unexpected case - unclear result
-                logger.warning(f"Unblock script returned unclear result for {ip}: return_code={result.returncode}, output={script_output}")
-                print(f"⚠️  Unblock script returned unclear result for {ip}: return_code={result.returncode}", flush=True)
-                # If return code is 0 but no success message, assume it worked
-                if result.returncode == 0:
-                    if mac in self.blocked_devices:
-                        del self.blocked_devices[mac]
-                    return True
+                # Real error occurred
+                logger.error(f"Failed to unblock device {ip}: {error_msg}")
                 return False
-            
-        except subprocess.TimeoutExpired:
-            logger.error(f"Unblock script timeout for IP: {ip}")
-            return False
-        except Exception as e:
-            logger.error(f"Failed to unblock device {ip}: {e}", exc_info=True)
+        else:
+            # Unexpected case - unclear result
+            logger.warning(f"Unblock script returned unclear result for {ip}: return_code={result.returncode}, output={script_output}")
+            # If return code is 0 but no success message, assume it worked
+            if result.returncode == 0:
+                if mac in self.blocked_devices:
+                    del self.blocked_devices[mac]
+                self._blocked_ips.discard(ip)
+                return True
             return False
     
     def get_blocked_devices(self) -> List[Dict[str, str]]:
@@ -283,49 +338,74 @@ class FirewallController:
         """Check if device is blocked (from memory cache)"""
         return mac in self.blocked_devices
     
-    def is_ip_blocked_in_firewall(self, ip: str) -> bool:
-        """Check if an IP is actually blocked in nftables firewall by checking the malicious_devices set"""
+    def is_ip_blocked_in_firewall(self, ip: str, force_refresh: bool = False) -> bool:
+        """Check if an IP is blocked in the nftables malicious_devices set
+        
+        Answers from an in-memory copy of the set that is updated on block/unblock and
+        re-synced from nftables every BLOCKED_SET_TTL seconds to catch out-of-band changes.
+        Pass force_refresh=True to query nftables now.
+        """
+        if force_refresh or time.monotonic() - self._blocked_ips_synced_at > BLOCKED_SET_TTL:
+            self._refresh_blocked_ips()
+        
+        is_blocked = ip in self._blocked_ips
+        logger.debug(f"[FIREWALL_CHECK] IP: {ip} | Status: {'BLOCKED' if is_blocked else 'NOT BLOCKED'}")
+        return is_blocked
+    
+    def _refresh_blocked_ips(self):
+        """Re-sync the cached blocked set from nftables (keeps the old copy if the query fails)"""
+        elements = None
         try:
-            # Check if IP is in the malicious_devices set
-            # Using the same table/set as the scripts: inet homefw malicious_devices
-            family = "inet"
-            table = "homefw"
-            set_name = "malicious_devices"
-            
-            # Run: nft list set inet homefw malicious_devices
-            result = subprocess.run(
-                ["nft", "list", "set", family, table, set_name],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                # Parse the output to check if IP is in the set
-                # Output format: elements = { 10.10.0.11, 192.168.1.100 }
-                output = result.stdout
-                
-                # Extract IPs from the output (look for the IP in the elements list)
-                # The IP should appear as a standalone element in the set
-                # Check if IP appears as a word boundary (to avoid partial matches)
-                import re
-                # Match IP as a complete word in the elements list
-                ip_pattern = r'\b' + re.escape(ip) + r'\b'
-                is_blocked = bool(re.search(ip_pattern, output))
-                
-                logger.info(f"[FIREWALL_CHECK] IP: {ip} | Status: {'BLOCKED' if is_blocked else 'NOT BLOCKED'} | Set contents: {output.strip()}")
-                print(f"[FIREWALL_CHECK] 🔍 IP: {ip} | Status: {'🚫 BLOCKED' if is_blocked else '✅ NOT BLOCKED'} | Set: {output.strip()[:100]}", flush=True)
-                return is_blocked
-            else:
-                # If set doesn't exist or command failed, assume not blocked
-                logger.warning(f"[FIREWALL_CHECK] Failed to check firewall state for {ip}: {result.stderr}")
-                print(f"[FIREWALL_CHECK] ⚠️  Failed to check {ip}: {result.stderr.strip()}", flush=True)
-                return False
-                
+            if self._nft is not None:
+                elements = self._list_set_elements_nft()
+            if elements is None:
+                elements = self._list_set_elements_cli()
         except Exception as e:
-            logger.error(f"[FIREWALL_CHECK] Error checking firewall state for {ip}: {e}", exc_info=True)
-            print(f"[FIREWALL_CHECK] ❌ Error checking {ip}: {e}", flush=True)
-            return False
+            logger.error(f"[FIREWALL_CHECK] Error reading firewall state: {e}", exc_info=True)
+        
+        # Stamp even on failure so a missing nft doesn't get re-run on every lookup
+        self._blocked_ips_synced_at = time.monotonic()
+        if elements is not None:
+            self._blocked_ips = elements
+    
+    def _list_set_elements_cli(self) -> Optional[set]:
+        """Read the blocked set by running `nft list set`; None if the command failed"""
+        # Run: nft list set inet homefw malicious_devices
+        result = subprocess.run(
+            ["nft", "list", "set", NFT_FAMILY, NFT_TABLE, NFT_BLOCKED_SET],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        
+        if result.returncode != 0:
+            # If set doesn't exist or command failed, the caller keeps its previous state
+            logger.warning(f"[FIREWALL_CHECK] Failed to read firewall state: {result.stderr}")
+            return None
+        
+        match = _SET_ELEMENTS_RE.search(result.stdout)
+        if not match:
+            return set()
+        return {element.strip() for element in match.group(1).split(",") if element.strip()}
+    
+    def _list_set_elements_nft(self) -> Optional[set]:
+        """Read the blocked set through libnftables' JSON API; None if the query failed"""
+        rc, output, error = self._nft.json_cmd({"nftables": [
+            {"list": {"set": {"family": NFT_FAMILY, "table": NFT_TABLE, "name": NFT_BLOCKED_SET}}}
+        ]})
+        if rc != 0:
+            logger.warning(f"[FIREWALL_CHECK] libnftables list set failed: {error}")
+            return None
+        
+        elements = set()
+        for item in output.get("nftables", []):
+            for elem in item.get("set", {}).get("elem", []):
+                # Plain addresses are strings; elements with timeouts etc. are wrapped as {"elem": {"val": ...}}
+                if isinstance(elem, dict):
+                    elem = elem.get("elem", {}).get("val")
+                if isinstance(elem, str):
+                    elements.add(elem)
+        return elements
     
     def clear_all_rules(self) -> bool:
         """Clear all blocking rules (caution!)"""
@@ -334,7 +414,7 @@ class FirewallController:
             logger.info(f"[CLEAR] {cmd}")
             
             self.blocked_devices.clear()
-            print("🗑️  All firewall rules cleared")
+            logger.info("All firewall rules cleared")
             return True
             
         except Exception as e:
@@ -0,0 +1,115 @@
+"""
+Batched MongoDB writer for high-rate documents (security logs)
+"""
+import asyncio
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from database.mongodb import get_security_logs_collection
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class AsyncLogBatcher:
+    """Coalesces queued documents and writes them with a single insert_many"""
+
+    def __init__(self, get_collection: Callable, max_batch: int = 100, max_delay: float = 0.05,
+                 max_attempts: int = 3, retry_delay: float = 0.2):
+        self._get_collection = get_collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, document: dict) -> asyncio.Future:
+        """
+        Queue a document for insertion; the writer task starts on first use
+
+        Returns a future resolved once the batch holding the document is written
+        (or failed with the write error), so callers can await the insert.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((document, future))
+        return future
+
+    async def _run(self):
+        """Wait for a document, then gather more for up to max_delay or max_batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Write a batch, retrying transient failures, and resolve each document's future"""
+        pending = batch
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                # Unordered so one bad document doesn't stop the rest
+                await self._get_collection().insert_many([doc for doc, _ in pending], ordered=False)
+                failed = {}
+            except BulkWriteError as e:
+                # Ids are assigned before queueing, so a duplicate key means an earlier attempt stored it
+                failed = {
+                    error["index"]: error for error in e.details.get("writeErrors", [])
+                    if error.get("code") != DUPLICATE_KEY
+                }
+            except Exception as e:
+                if attempt < self.max_attempts:
+                    logger.warning(f"Failed to write batch of {len(pending)} document(s), retrying: {e}")
+                    await asyncio.sleep(self.retry_delay * attempt)
+                    continue
+                logger.error(f"Giving up on batch of {len(pending)} document(s) after {attempt} attempts: {e}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for index, (doc, future) in enumerate(pending):
+                if future.done():
+                    continue
+                error = failed.get(index)
+                if error is None:
+                    future.set_result(doc["_id"])
+                else:
+                    logger.error(f"Failed to write document {doc.get('_id')}: {error.get('errmsg')}")
+                    future.set_exception(BulkWriteError({"writeErrors": [error]}))
+            return
+
+    async def stop(self):
+        """Let the writer task drain the queue, then stop it"""
+        if self._task and not self._task.done():
+            # Sentinel goes behind every queued document, so all of them are flushed first
+            self._queue.put_nowait(None)
+            await self._task
+        self._task = None
+
+
+# Global instance
+security_log_batcher = AsyncLogBatcher(get_security_logs_collection)
@@ -1,8 +1,12 @@
 """
 Security utilities: JWT, password hashing, authentication
 """
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -14,10 +18,23 @@ from database.models import TokenData
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt is CPU-bound (and releases the GIL), so it runs here instead of on the event loop
+_hash_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="bcrypt")
 
 # JWT Bearer
 security = HTTPBearer()
 
+# username -> (loaded_at, user doc); saves a users lookup on every authenticated request
+_user_cache: Dict[str, Tuple[float, dict]] = {}
+
+
+def invalidate_user_cache(username: Optional[str] = None):
+    """Drop a cached user (or all users) after the user document changes"""
+    if username is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(username, None)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -74,8 +91,17 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     token = credentials.credentials
     token_data = decode_token(token)
     
-    users_collection = get_users_collection()
-    user = await users_collection.find_one({"username": token_data.username})
+    now = time.monotonic()
+    cached = _user_cache.get(token_data.username)
+    if cached is not None and now - cached[0] < settings.USER_CACHE_TTL:
+        user = cached[1]
+    else:
+        users_collection = get_users_collection()
+        user = await users_collection.find_one({"username": token_data.username})
+        if user is not None:
+            _user_cache[token_data.username] = (now, user)
+        else:
+            _user_cache.pop(token_data.username, None)
     
     if user is None:
         raise HTTPException(
@@ -89,7 +115,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Inactive user"
         )
     
-    return user
+    # Routes rewrite fields like _id in place, so each request gets its own copy
+    return dict(user)
 
 
 async def authenticate_user(username: str, password: str):
@@ -99,6 +126,7 @@ async def authenticate_user(username: str, password: str):
     
     if not user:
         return False
-    if not verify_password(password, user["password_hash"]):
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(_hash_executor, verify_password, password, user["password_hash"]):
         return False
     return user
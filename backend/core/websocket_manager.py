@@ -1,9 +1,16 @@
 """
 WebSocket Connection Manager for Real-time Communication
 """
+import asyncio
+import logging
 from fastapi import WebSocket
-from typing import List, Dict
-import json
+from typing import List, Dict, Set
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Clients sent to per event-loop turn when broadcasting
+BROADCAST_CHUNK_SIZE = 50
 
 
 class WebSocketManager:
@@ -11,42 +18,51 @@ class WebSocketManager:
     
     def __init__(self):
         # Dictionary to store connections by channel
-        self.active_connections: Dict[str, List[WebSocket]] = {
-            "alerts": [],
-            "devices": []
+        # Sets keep connect/disconnect O(1) during reconnect storms
+        self.active_connections: Dict[str, Set[WebSocket]] = {
+            "alerts": set(),
+            "devices": set()
         }
     
     async def connect(self, websocket: WebSocket, channel: str):
         """Accept and register a new WebSocket connection"""
         await websocket.accept()
-        if channel not in self.active_connections:
-            self.active_connections[channel] = []
-        self.active_connections[channel].append(websocket)
-        print(f"✅ WebSocket connected to channel: {channel}")
+        self.active_connections.setdefault(channel, set()).add(websocket)
+        logger.debug(f"WebSocket connected to channel: {channel}")
     
     def disconnect(self, websocket: WebSocket, channel: str):
         """Remove a WebSocket connection"""
-        if channel in self.active_connections:
-            if websocket in self.active_connections[channel]:
-                self.active_connections[channel].remove(websocket)
-                print(f"❌ WebSocket disconnected from channel: {channel}")
+        connections = self.active_connections.get(channel)
+        if connections is not None and websocket in connections:
+            connections.discard(websocket)
+            logger.debug(f"WebSocket disconnected from channel: {channel}")
     
     async def broadcast_to_channel(self, channel: str, message: dict):
         """Broadcast message to all connections in a channel"""
-        if channel not in self.active_connections:
+        if not self.active_connections.get(channel):
             return
         
-        disconnected = []
-        for connection in self.active_connections[channel]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Error sending to websocket: {e}")
-                disconnected.append(connection)
+        # Serialize once for the whole channel instead of once per client
+        frame = orjson.dumps(message, default=str).decode()
         
-        # Remove disconnected websockets
-        for conn in disconnected:
-            self.disconnect(conn, channel)
+        # Send to clients concurrently so latency is the slowest client, not the sum;
+        # go in chunks and yield between them so a large fan-out doesn't hog the loop
+        # Snapshot: the set may change while sends are awaited
+        connections = list(self.active_connections[channel])
+        for start in range(0, len(connections), BROADCAST_CHUNK_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            chunk = connections[start:start + BROADCAST_CHUNK_SIZE]
+            results = await asyncio.gather(
+                *(connection.send_text(frame) for connection in chunk),
+                return_exceptions=True
+            )
+            
+            # Remove disconnected websockets
+            for connection, result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Error sending to websocket: {result}")
+                    self.disconnect(connection, channel)
     
     async def send_alert(self, alert_data: dict):
         """Send alert to all connected clients"""
@@ -55,6 +71,16 @@ class WebSocketManager:
             "data": alert_data
         })
     
+    async def send_alerts_batch(self, alerts: List[dict]):
+        """Send several alerts to all connected clients as a single frame"""
+        if len(alerts) == 1:
+            await self.send_alert(alerts[0])
+            return
+        await self.broadcast_to_channel("alerts", {
+            "type": "alerts_batch",
+            "items": alerts
+        })
+    
     async def send_device_update(self, device_data: dict):
         """Send device status update to all connected clients"""
         await self.broadcast_to_channel("devices", {
@@ -1,7 +1,7 @@
 """
 Database Models (Pydantic Schemas)
 """
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -63,8 +63,7 @@ class DeviceResponse(Device):
     """Device response with ID"""
     id: str = Field(..., alias="_id", description="Device ID")
 
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class DeviceUpdate(BaseModel):
@@ -101,8 +100,7 @@ class AlertResponse(Alert):
     """Alert response with ID"""
     id: str = Field(..., alias="_id")
 
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 # ============= User Models =============
@@ -145,8 +143,7 @@ class UserProfile(BaseModel):
     created_at: Optional[datetime] = None
     last_login: Optional[datetime]
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class UserLogin(BaseModel):
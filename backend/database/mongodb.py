@@ -1,26 +1,90 @@
 """
 MongoDB Database Connection and Management
 """
+import asyncio
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 # Database instance
 client: AsyncIOMotorClient = None
 database = None
 
+# Collection handles, bound once in connect_db so the getters don't build a new one per call
+devices_col = None
+alerts_col = None
+users_col = None
+security_alerts_col = None
+security_logs_col = None
+
 
 async def connect_db():
     """Connect to MongoDB"""
     global client, database
     try:
-        client = AsyncIOMotorClient(settings.MONGODB_URL)
+        pool_options = {
+            "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+            "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+            "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        }
+        if settings.MONGODB_COMPRESSORS:
+            pool_options["compressors"] = settings.MONGODB_COMPRESSORS
+        client = AsyncIOMotorClient(settings.MONGODB_URL, **pool_options)
         database = client[settings.DATABASE_NAME]
-        # Test connection
+        # Test connection (also opens the first pooled connection before requests arrive)
         await client.admin.command('ping')
-        print(f"✅ Connected to MongoDB: {settings.DATABASE_NAME}")
+        _bind_collections()
+        logger.info(f"Connected to MongoDB: {settings.DATABASE_NAME}")
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
+        logger.error(f"MongoDB connection failed: {e}")
         raise
+    await create_indexes()
+
+
+def _bind_collections():
+    """Cache the collection handles for the current database"""
+    global devices_col, alerts_col, users_col, security_alerts_col, security_logs_col
+    devices_col = database.devices
+    alerts_col = database.alerts
+    users_col = database.users
+    security_alerts_col = database.security_alerts
+    security_logs_col = database.security_logs
+
+
+async def create_indexes():
+    """Create indexes (idempotent - no-op if they already exist)"""
+    day = 60 * 60 * 24
+    indexes = [
+        # TTL indexes: security queries only look back a bounded number of days,
+        # so let MongoDB expire older documents instead of growing forever
+        (database.security_alerts, "timestamp", {"expireAfterSeconds": settings.SECURITY_ALERT_RETENTION_DAYS * day}),
+        (database.security_logs, "timestamp", {"expireAfterSeconds": settings.SECURITY_LOG_RETENTION_DAYS * day}),
+        # Alert lookups that don't go through the composite "alert_id:device_ip" _id
+        (database.alerts, [("alert_id", 1), ("device_ip", 1)], {}),
+        # Alert list: newest first, optionally narrowed to one device
+        (database.alerts, [("timestamp", -1)], {}),
+        (database.alerts, [("device_ip", 1), ("timestamp", -1)], {}),
+        # Device lookups by IP or MAC (the $or fallback when the id isn't an ObjectId)
+        (database.devices, "ip", {}),
+        (database.devices, "mac", {}),
+        # Every authenticated request resolves the user by username
+        (database.users, "username", {"unique": True}),
+        # Admin lookup for alert email fan-out
+        (database.users, [("role", 1), ("preferences.notifications_enabled", 1)], {}),
+    ]
+    # Independent builds, so issue them concurrently rather than one round trip after another
+    results = await asyncio.gather(
+        *(collection.create_index(keys, **options) for collection, keys, options in indexes),
+        return_exceptions=True
+    )
+    for (collection, keys, _), result in zip(indexes, results):
+        if isinstance(result, Exception):
+            # Don't fail startup on an index conflict (e.g. retention changed)
+            logger.warning(f"Could not create index {keys} on {collection.name}: {result}")
 
 
 async def close_db():
@@ -28,7 +92,7 @@ async def close_db():
     global client
     if client:
         client.close()
-        print("✅ MongoDB connection closed")
+        logger.info("MongoDB connection closed")
 
 
 def get_database():
@@ -39,27 +103,27 @@ def get_database():
 # Collection helpers
 def get_devices_collection():
     """Get devices collection"""
-    return database.devices
+    return devices_col
 
 
 def get_alerts_collection():
     """Get alerts collection"""
-    return database.alerts
+    return alerts_col
 
 
 def get_users_collection():
     """Get users collection"""
-    return database.users
+    return users_col
 
 
 def get_security_alerts_collection():
     """Get security alerts collection"""
-    return database.security_alerts
+    return security_alerts_col
 
 
 def get_security_logs_collection():
     """Get security logs collection"""
-    return database.security_logs
+    return security_logs_col
 
 
 def get_push_subscriptions_collection():
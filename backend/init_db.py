@@ -8,29 +8,40 @@ from database.mongodb import (
     connect_db, 
     get_users_collection, 
 )
+from config import settings
 from core.security import get_password_hash
 
 
 async def init_admin_user():
     """Create default admin user"""
     users = get_users_collection()
+    admin_filter = {"$or": [{"username": "admin"}, {"email": "admin@homeguard.local"}]}
     
-    # Check if admin exists by username or email
-    existing = await users.find_one({"username": "admin"})
-    if not existing:
-        # Check if legacy email user exists and update
-        legacy = await users.find_one({"email": "admin@homeguard.local"})
-        if legacy and "username" not in legacy:
-            await users.update_one(
-                {"_id": legacy["_id"]},
-                {"$set": {"username": "admin"}}
-            )
-            print("✅ Updated legacy admin user with username='admin'")
-        elif not legacy:
-            await users.insert_one({
-                "username": "admin",
+    # One probe covers both the current admin and a legacy email-only admin
+    existing = await users.find_one(admin_filter, {"username": 1})
+    if existing and "username" in existing:
+        print("ℹ️  Admin user already exists")
+        return
+    if existing:
+        # Legacy email user without a username: migrate it in place
+        await users.update_one(
+            {"_id": existing["_id"]},
+            {"$set": {"username": "admin"}}
+        )
+        print("✅ Updated legacy admin user with username='admin'")
+        return
+    
+    now = datetime.utcnow()
+    # bcrypt is deliberately slow, so only pay for it once we know the admin is missing
+    password_hash = settings.ADMIN_PASSWORD_HASH or get_password_hash("admin123")
+    # Equality filter on the unique username so MongoDB retries the upsert instead of
+    # raising E11000 when another init run inserts the admin concurrently
+    result = await users.update_one(
+        {"username": "admin"},
+        {
+            "$setOnInsert": {
                 "email": "admin@homeguard.local",
-                "password_hash": get_password_hash("admin123"),
+                "password_hash": password_hash,
                 "full_name": "Admin User",
                 "role": "admin",
                 "is_active": True,
@@ -42,15 +53,20 @@ async def init_admin_user():
                     "notifications_enabled": True,
                     "language": "en"
                 },
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow(),
+                "created_at": now,
+                "updated_at": now,
                 "last_login": None
-            })
-            print("✅ Admin user created")
-            print("   Username: admin")
-            print("   Password: admin123")
-    else:
+            }
+        },
+        upsert=True
+    )
+    if result.upserted_id is None:
         print("ℹ️  Admin user already exists")
+        return
+    lines = ["✅ Admin user created", "   Username: admin"]
+    if not settings.ADMIN_PASSWORD_HASH:
+        lines.append("   Password: admin123")
+    print("\n".join(lines))
 
 
 async def main():
@@ -63,9 +79,11 @@ async def main():
     # Create admin user (required for authentication)
     await init_admin_user()
     
-    print("\n✅ Database initialization complete!")
-    print("ℹ️  Note: Devices and alerts are now read from JSON files")
-    print("   (configured via DEVICES_FILE_PATH and ALERTS_FILE_PATH)")
+    print(
+        "\n✅ Database initialization complete!\n"
+        "ℹ️  Note: Devices and alerts are now read from JSON files\n"
+        "   (configured via DEVICES_FILE_PATH and ALERTS_FILE_PATH)"
+    )
 
 
 if __name__ == "__main__":
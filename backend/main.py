@@ -2,15 +2,21 @@
 HomeGuard - Per-Device Behavioral Firewall for Smart Homes
 FastAPI Backend with OpenAPI/Swagger Documentation
 """
+import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.openapi.utils import get_openapi
 from contextlib import asynccontextmanager
 
+from config import settings
 from database.mongodb import connect_db, close_db
 from api.routes import auth, devices, alerts, users, websocket as websocket_routes
 from core.alert_monitor import alert_monitor
+from core.logging_config import setup_logging, shutdown_logging
+from core.log_batcher import security_log_batcher
+
+logger = logging.getLogger(__name__)
 
 # ============= Lifespan Context Manager =============
 
@@ -18,35 +24,28 @@ from core.alert_monitor import alert_monitor
 async def lifespan(app: FastAPI):
     """Manage app startup and shutdown"""
     # Startup
-    import sys
-    print("🚀 FastAPI lifespan: Starting...", flush=True)
-    sys.stdout.flush()
+    setup_logging()
+    logger.info("HomeGuard API is starting up...")
+    # Build the OpenAPI schema now so the first /docs request doesn't pay for it
+    app.openapi()
     try:
-        print("🔌 Connecting to database...", flush=True)
         await connect_db()
-        print("✅ Database connected, starting alert monitor...", flush=True)
         # Start alert monitoring (non-blocking, don't fail if it errors)
         try:
-            print("📡 Calling alert_monitor.start()...", flush=True)
             await alert_monitor.start()
-            print("✅ Alert monitor start() completed", flush=True)
         except Exception as e:
-            print(f"⚠️  Warning: Alert monitoring failed to start: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-            sys.stdout.flush()
             # Don't crash the app if monitoring fails
+            logger.warning(f"Alert monitoring failed to start: {e}", exc_info=True)
     except Exception as e:
-        print(f"❌ Error during startup: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        sys.stdout.flush()
+        logger.error(f"Error during startup: {e}", exc_info=True)
         raise
     yield
     # Shutdown
-    print("🛑 FastAPI lifespan: Shutting down...", flush=True)
-    alert_monitor.monitoring = False
+    logger.info("HomeGuard API is shutting down...")
+    await alert_monitor.stop()
+    await security_log_batcher.stop()
     await close_db()
+    shutdown_logging()
 
 
 # ============= FastAPI App =============
@@ -84,6 +83,8 @@ Error responses include detailed error messages for debugging.
     redoc_url="/redoc",
     openapi_url="/openapi.json",
     lifespan=lifespan,
+    # orjson encodes route responses (the WebSocket broadcasts already use it)
+    default_response_class=ORJSONResponse,
     contact={
         "name": "HomeGuard Support",
         "url": "https://homeguard.local",
@@ -97,16 +98,17 @@ Error responses include detailed error messages for debugging.
 
 # ============= CORS Configuration =============
 
+# The dashboard is served same-origin (nginx / Vite proxy), so only configured
+# origins need CORS; browsers reject "*" together with credentials anyway.
+# Origin headers never carry a trailing slash, so strip it from configured values.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, set specific origins
+    allow_origins=[origin.rstrip("/") for origin in settings.CORS_ORIGINS],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
-app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
-
 # ============= API Routes with Tags =============
 
 app.include_router(
@@ -188,6 +190,10 @@ async def root():
 
 # ============= Custom OpenAPI Schema =============
 
+# Paths documented without the Bearer security requirement
+_PUBLIC_PATHS = frozenset(["/health", "/", "/docs", "/redoc", "/openapi.json"])
+
+
 def custom_openapi():
     """Generate custom OpenAPI schema with enhanced documentation"""
     if app.openapi_schema:
@@ -250,7 +256,7 @@ def custom_openapi():
     
     # Add security to all endpoints except health and docs
     for path, methods in openapi_schema["paths"].items():
-        if path not in ["/health", "/", "/docs", "/redoc", "/openapi.json"]:
+        if path not in _PUBLIC_PATHS:
             for method, operation in methods.items():
                 if isinstance(operation, dict) and "security" not in operation:
                     operation["security"] = [{"BearerTokenAuth": []}]
@@ -262,20 +268,6 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 
-# ============= Event Handlers =============
-
-@app.on_event("startup")
-async def startup_event():
-    """Startup event"""
-    print("🚀 HomeGuard API is starting up...")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Shutdown event"""
-    print("🛑 HomeGuard API is shutting down...")
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -283,6 +275,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Both ship with uvicorn[standard]; fail loudly rather than silently fall back
+        loop="uvloop",
+        http="httptools"
     )
 
@@ -40,6 +40,9 @@ class WebSocketService {
         // Handle both direct alert messages and structured messages
         if (message.type === 'new_alert') {
           onAlert(message);
+        } else if (message.type === 'alerts_batch' && Array.isArray(message.items)) {
+          // Several alerts detected at once are sent as a single frame
+          message.items.forEach((item: any) => onAlert({ type: 'new_alert', data: item }));
         } else if (message.data && message.data.alert_id) {
           // Handle direct alert data
           onAlert({ type: 'new_alert', data: message.data });
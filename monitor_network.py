@@ -1,45 +1,62 @@
-import json
+import os
+import select
+import socket
 import time
-import subprocess
-import re
 from pathlib import Path
 
+import orjson
+from pyroute2 import IPRoute
+from pyroute2.netlink.rtnl import RTMGRP_NEIGH
+
 # Configuration
 OUTPUT_FILE = "data/active_devices.json"
 WIFI_INTERFACE = "wlx3c6ad20d17fa"  # Your Wi-Fi adapter name
 
-def get_arp_table():
-    """Run ip neigh show and parse output"""
+# Neighbour (NUD) states from linux/neighbour.h that count as a present device
+NUD_REACHABLE = 0x02
+NUD_STATE_NAMES = {NUD_REACHABLE: "REACHABLE", 0x04: "STALE", 0x08: "DELAY", 0x10: "PROBE"}
+
+EVENT_DEBOUNCE = 0.5  # Seconds to let a burst of neighbour events settle before re-reading
+RESYNC_INTERVAL = 60  # Re-read without events too, in case the kernel dropped notifications
+
+def get_arp_table(ipr):
+    """Read the IPv4 neighbour table for the Wi-Fi interface over netlink"""
     devices = {}
     try:
-        # Run ip neigh show
-        result = subprocess.run(['ip', 'neigh', 'show'], capture_output=True, text=True)
-        lines = result.stdout.splitlines()
+        # Looked up each time so a restarted hotspot interface (new ifindex) is picked up
+        links = ipr.link_lookup(ifname=WIFI_INTERFACE)
+        if not links:
+            print(f"Interface {WIFI_INTERFACE} not found")
+            return devices
         
-        for line in lines:
-            parts = line.split()
-            if len(parts) >= 5:
-                ip = parts[0]
-                dev = parts[2]
-                mac = parts[4]
-                state = parts[-1]
-                
-                # Filter only devices on your Wi-Fi hotspot
-                if dev == WIFI_INTERFACE and state in ['REACHABLE', 'STALE', 'DELAY', 'PROBE']:
-                    devices[mac] = {
-                        "ip": ip,
-                        "mac": mac,
-                        "status": "active" if state == 'REACHABLE' else "idle",
-                        "interface": dev,
-                        "last_seen": time.time()
-                    }
-                    print(f"Found: {ip} ({mac}) - {state}")
+        for neigh in ipr.get_neighbours(family=socket.AF_INET, ifindex=links[0]):
+            state = neigh["state"]
+            ip = neigh.get_attr("NDA_DST")
+            mac = neigh.get_attr("NDA_LLADDR")
+            
+            # Filter only devices currently present on your Wi-Fi hotspot
+            if ip and mac and state in NUD_STATE_NAMES:
+                devices[mac] = {
+                    "ip": ip,
+                    "mac": mac,
+                    "status": "active" if state == NUD_REACHABLE else "idle",
+                    "interface": WIFI_INTERFACE,
+                    "last_seen": time.time()
+                }
+                print(f"Found: {ip} ({mac}) - {NUD_STATE_NAMES[state]}")
                     
     except Exception as e:
-        print(f"Error running ip neigh: {e}")
+        print(f"Error reading neighbour table: {e}")
         
     return devices
 
+def write_devices(devices):
+    """Write the device map atomically so readers never see a half-written file"""
+    tmp_file = OUTPUT_FILE + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(devices, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, OUTPUT_FILE)
+
 def main():
     print(f"Starting Network Monitor on interface: {WIFI_INTERFACE}")
     print(f"Saving to: {OUTPUT_FILE}")
@@ -47,19 +64,38 @@ def main():
     # Ensure data directory exists
     Path("data").mkdir(exist_ok=True)
     
+    # One netlink socket for the life of the monitor instead of an `ip neigh` process per poll
+    ipr = IPRoute()
+    # Separate socket subscribed to neighbour add/update/delete notifications
+    events = IPRoute()
+    events.bind(groups=RTMGRP_NEIGH)
+    poller = select.poll()
+    poller.register(events.fileno(), select.POLLIN)
+    
+    # (mac, ip, status) of the last write; last_seen alone changing doesn't warrant a rewrite
+    last_written = None
+    
     while True:
         try:
-            active_devices = get_arp_table()
+            active_devices = get_arp_table(ipr)
             
             # Save to JSON file
-            with open(OUTPUT_FILE, 'w') as f:
-                json.dump(active_devices, f, indent=2)
+            snapshot = {(mac, d["ip"], d["status"]) for mac, d in active_devices.items()}
+            if snapshot != last_written:
+                write_devices(active_devices)
+                last_written = snapshot
                 
-            # Wait 10 seconds
-            time.sleep(10)
+            # Sleep until the neighbour table changes instead of polling every 10 seconds
+            if poller.poll(RESYNC_INTERVAL * 1000):
+                # Coalesce the rest of the burst into a single re-read
+                time.sleep(EVENT_DEBOUNCE)
+                while poller.poll(0):
+                    events.get()
             
         except KeyboardInterrupt:
             print("\nStopping monitor...")
+            events.close()
+            ipr.close()
             break
         except Exception as e:
             print(f"Error in main loop: {e}")
@@ -743,10 +743,10 @@ import joblib
 import json
 from google.colab import files
 
-# 1. Save the trained models
-joblib.dump(scaler, 'scaler.pkl')
-joblib.dump(pca, 'pca.pkl')
-joblib.dump(iso, 'iso_forest1.pkl')
+# 1. Save the trained models (uncompressed, so the device can memory-map the scaler/PCA arrays)
+joblib.dump(scaler, 'scaler.pkl', compress=0)
+joblib.dump(pca, 'pca.pkl', compress=0)
+joblib.dump(iso, 'iso_forest1.pkl', compress=0)
 
 # 2. Save the Threshold (using the best one found: 0.087495...)
 threshold_data = {'threshold': 0.08749525138718628}
@@ -758,13 +758,23 @@ with open('threshold.json', 'w') as f:
 with open('feature_cols.json', 'w') as f:
     json.dump(list(feature_cols), f)
 
-# 4. Download them all to your computer
-file_list = ['scaler.pkl', 'pca.pkl', 'iso_forest1.pkl', 'threshold.json', 'feature_cols.json']
+# 4. Bundle everything into one file too: the device loads a single pickle stream and the
+# scaler/PCA/forest/threshold/columns can't drift apart between exports
+joblib.dump({
+    'scaler': scaler,
+    'pca': pca,
+    'iso': iso,
+    'threshold': threshold_data['threshold'],
+    'feature_cols': list(feature_cols),
+}, 'homeguard_bundle.pkl', compress=0)
+
+# 5. Download them all to your computer
+file_list = ['homeguard_bundle.pkl', 'scaler.pkl', 'pca.pkl', 'iso_forest1.pkl', 'threshold.json', 'feature_cols.json']
 
 for file in file_list:
     files.download(file)
 
-print("All 5 files are being downloaded to your 'Downloads' folder.")
+print(f"All {len(file_list)} files are being downloaded to your 'Downloads' folder.")
 
 import time
 import pandas as pd
@@ -863,13 +873,33 @@ class HomeGuardBrain:
     def __init__(self):
         print(f"Initializing HomeGuard AI (Window={WINDOW_SIZE}s, Roll={HISTORY_LEN})...")
         try:
-            self.scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
-            self.iso = joblib.load(os.path.join(MODEL_DIR, "iso_forest1.pkl"))
-            self.pca = joblib.load(os.path.join(MODEL_DIR, "pca.pkl"))
-            with open(os.path.join(MODEL_DIR, "threshold.json")) as f:
-                self.threshold = json.load(f)["threshold"]
-            with open(os.path.join(MODEL_DIR, "feature_cols.json")) as f:
-                self.feature_cols = json.load(f)
+            # mmap_mode: only the scaler and PCA ndarrays are paged in read-only from the file and
+            # shared between processes. The IsolationForest's estimators are unpickled as ordinary
+            # Python objects (Tree.__setstate__ copies their node/value arrays onto the heap), so
+            # every process still holds its own copy of the forest.
+            bundle_path = os.path.join(MODEL_DIR, "homeguard_bundle.pkl")
+            if os.path.exists(bundle_path):
+                bundle = joblib.load(bundle_path, mmap_mode="r")
+                self.scaler = bundle["scaler"]
+                self.pca = bundle["pca"]
+                self.iso = bundle["iso"]
+                self.threshold = bundle["threshold"]
+                self.feature_cols = bundle["feature_cols"]
+            else:
+                # Exports from before the bundle existed
+                self.scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"), mmap_mode="r")
+                self.iso = joblib.load(os.path.join(MODEL_DIR, "iso_forest1.pkl"), mmap_mode="r")
+                self.pca = joblib.load(os.path.join(MODEL_DIR, "pca.pkl"), mmap_mode="r")
+                with open(os.path.join(MODEL_DIR, "threshold.json")) as f:
+                    self.threshold = json.load(f)["threshold"]
+                with open(os.path.join(MODEL_DIR, "feature_cols.json")) as f:
+                    self.feature_cols = json.load(f)
+            # Scoring runs the trees in parallel (scikit-learn >= 1.6, pinned to 1.7.2 above);
+            # don't depend on whatever n_jobs the forest happened to be pickled with; more workers than trees is wasted
+            self.iso.set_params(n_jobs=min(os.cpu_count() or 1, self.iso.n_estimators))
+            # Scaling is applied as one fused (X - center) * inv_scale pass in process_window,
+            # skipping sklearn's per-call validation; other scalers fall back to scaler.transform
+            self._center, self._inv_scale = self._fused_scaling(self.scaler, len(self.feature_cols))
             print("Models & Thresholds Loaded.")
         except Exception as e:
             print(f"CRITICAL LOAD ERROR: {e}")
@@ -881,6 +911,23 @@ class HomeGuardBrain:
         self.device_manager.refresh()
         self.aggregator = ZeekFixedWindowAggregator(window_size=WINDOW_SIZE, rolling_window=HISTORY_LEN)
 
+    @staticmethod
+    def _fused_scaling(scaler, n_features):
+        """(center, inv_scale) reproducing scaler.transform, or (None, None) if it can't be fused"""
+        params = scaler.get_params()
+        if "with_centering" in params:  # RobustScaler
+            center = scaler.center_ if params["with_centering"] else None
+            scale = scaler.scale_ if params["with_scaling"] else None
+        elif "with_mean" in params:  # StandardScaler
+            # mean_ is fitted even with with_mean=False, but transform doesn't subtract it then
+            center = scaler.mean_ if params["with_mean"] else None
+            scale = scaler.scale_ if params["with_std"] else None
+        else:
+            return None, None
+        center = np.zeros(n_features) if center is None else np.asarray(center, dtype=np.float64)
+        inv_scale = np.ones(n_features) if scale is None else 1.0 / np.asarray(scale, dtype=np.float64)
+        return center, inv_scale
+
     # --- RESTORED UTILITIES ---
     def _get_human_time(self):
         return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
@@ -967,16 +1014,25 @@ class HomeGuardBrain:
         X_feat, behavior_df = self.aggregator.transform_with_metadata(full_df)
         X_feat_aligned = X_feat.reindex(columns=self.feature_cols, fill_value=0)
 
-        X_scaled = self.scaler.transform(X_feat_aligned)
+        if self._inv_scale is not None:
+            X_scaled = (X_feat_aligned.to_numpy(dtype=np.float64) - self._center) * self._inv_scale
+        else:
+            X_scaled = self.scaler.transform(X_feat_aligned)
         X_pca    = self.pca.transform(X_scaled)
-        scores   = -self.iso.decision_function(X_pca)
+        # Tree traversal releases the GIL, so threads score in parallel over the one in-memory
+        # forest instead of pickling it to worker processes
+        with joblib.parallel_backend("threading"):
+            scores = -self.iso.decision_function(X_pca)
         preds    = scores >= self.threshold
 
         total_devices = 0
         total_anomalies = 0
 
-        for i, row in behavior_df.iterrows():
-            device_ip = row["id.orig_h"]
+        # Pull IPs and JSON-ready float features for all rows in one pass instead of iterrows()
+        device_ips = behavior_df["id.orig_h"].tolist()
+        feature_records = behavior_df.drop(columns=["id.orig_h", "time_bin"], errors="ignore").astype(float).to_dict("records")
+
+        for i, (device_ip, current_features) in enumerate(zip(device_ips, feature_records)):
             if self.is_blocked(device_ip): continue
 
             total_devices += 1
@@ -993,9 +1049,6 @@ class HomeGuardBrain:
             else:
                 self.update_device_status(device_ip, "Online")
 
-            current_features = row.drop(["id.orig_h", "time_bin"], errors="ignore").to_dict()
-            current_features = {k: float(v) if isinstance(v, (np.float64, np.int64, np.float32)) else v for k, v in current_features.items()}
-
             self.save_traffic_window(device_ip, current_features, anomaly_score, prediction, alert_id)
 
         duration = time.time() - t_start